@@ -5,7 +5,6 @@ import sys
 from datetime import datetime
 
 from runtime.artifact_store import build_artifact_store
-from runtime.excel_flow import puhemies_continue, puhemies_orchestrate, puhemies_run_from_file, write_human_confirmation
 
 
 def _repo_root() -> str:
@@ -32,11 +31,14 @@ def _load_header_candidates(artifacts_root, run_id):
 
 
 def run_command(args):
+    # The flow (and pandas with it) is imported per command so --help and usage errors return at once.
+    from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
+
     artifacts_root = _artifacts_root()
     run_id = args.run_id or datetime.utcnow().strftime("%Y%m%d-%H%M%S")
     input_path = os.path.abspath(args.input)
 
-    response = puhemies_run_from_file(run_id, input_path, artifacts_root)
+    response = puhemies_run_from_file(run_id, input_path, artifacts_root, output_format=args.output_format)
     response_dict = response.to_dict()
 
     print(response_dict["message"])
@@ -55,7 +57,7 @@ def run_command(args):
                     selected_id = choices[index]["id"]
             write_human_confirmation(artifacts_root, run_id, selected_id, confirmed_by="interactive")
             print(f"Confirmation saved for {selected_id}. Resuming...")
-            response_after = puhemies_continue(run_id, artifacts_root)
+            response_after = puhemies_continue(run_id, artifacts_root, output_format=args.output_format)
             print(response_after.to_dict()["message"])
             return 0
 
@@ -65,6 +67,8 @@ def run_command(args):
 
 
 def confirm_command(args):
+    from runtime.excel_flow import write_human_confirmation
+
     artifacts_root = _artifacts_root()
     run_id = args.run_id
     candidates = _load_header_candidates(artifacts_root, run_id)
@@ -77,8 +81,10 @@ def confirm_command(args):
 
 
 def resume_command(args):
+    from runtime.excel_flow import puhemies_continue
+
     artifacts_root = _artifacts_root()
-    response = puhemies_continue(args.run_id, artifacts_root)
+    response = puhemies_continue(args.run_id, artifacts_root, output_format=args.output_format)
     response_dict = response.to_dict()
     print(response_dict["message"])
     if response_dict["status"] == "needs_human_confirmation":
@@ -96,6 +102,12 @@ def main(argv=None):
     run_parser.add_argument("--input", required=True, help="Path to input file (.xlsx or .csv).")
     run_parser.add_argument("--run-id", help="Optional run id.")
     run_parser.add_argument("--interactive", action="store_true", help="Prompt for confirmation and resume.")
+    run_parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="csv writes output/clean.csv only; parquet also writes output/clean.parquet.",
+    )
     run_parser.set_defaults(func=run_command)
 
     confirm_parser = subparsers.add_parser("confirm", help="Confirm header choice for a run.")
@@ -105,6 +117,12 @@ def main(argv=None):
 
     resume_parser = subparsers.add_parser("resume", help="Resume a run after confirmation.")
     resume_parser.add_argument("--run-id", required=True, help="Run id to resume.")
+    resume_parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="csv writes output/clean.csv only; parquet also writes output/clean.parquet.",
+    )
     resume_parser.set_defaults(func=resume_command)
 
     args = parser.parse_args(argv)
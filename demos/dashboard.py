@@ -1,113 +1,178 @@
-import json
 import os
 import sys
 import tempfile
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
 import pandas as pd
 import streamlit as st
 
-from runtime.artifact_store import build_artifact_store
-from runtime.excel_flow import puhemies_continue, puhemies_run_from_file
-from simple_schema_builder import render_schema_builder
-
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEMOS_ROOT = os.path.join(REPO_ROOT, "demos")
+PREVIEW_ROWS = 500
+INDEX_TTL_SECONDS = 2.0
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 if DEMOS_ROOT not in sys.path:
     sys.path.insert(0, DEMOS_ROOT)
 
+# Only the light store helpers load at startup; excel_flow, the table readers and the schema
+# builder are imported at their first use.
+from dashboard_shared import (
+    artifact_fingerprint,
+    artifact_index,
+    ensure_dir,
+    materialize_input,
+    save_upload,
+    shadow_status,
+    shadow_statuses,
+    store_for_root,
+)
+from runtime import json_codec
+from runtime.artifact_store import is_gcs_uri
+
 
 def artifacts_root() -> str:
     return os.environ.get("ARTIFACTS_ROOT") or os.path.join(REPO_ROOT, "artifacts")
 
 
-def artifact_store():
-    return build_artifact_store(artifacts_root())
+def artifact_store(root: Optional[str] = None):
+    return store_for_root(root or artifacts_root())
 
 
 def uploads_dir() -> str:
-    path = os.path.join(REPO_ROOT, "demos", ".uploads")
-    os.makedirs(path, exist_ok=True)
-    return path
+    return ensure_dir(os.path.join(REPO_ROOT, "demos", ".uploads"))
 
 
-def load_json_from_store(store, key: str) -> Dict:
-    if not store.exists(key):
+def load_json_from_store(store, key: str, present: Optional[set] = None) -> Dict:
+    # present: keys from one prefix listing, used instead of a per-key exists() round-trip.
+    if present is not None:
+        if key not in present:
+            return {}
+    elif not store.exists(key):
         return {}
-    return json.loads(store.read_text(key))
-
-
-def list_runs(store) -> List[str]:
-    run_ids = set()
-    for key in store.list(""):
-        parts = key.split("/")
-        if parts and parts[0]:
-            run_ids.add(parts[0])
-    return sorted(run_ids, reverse=True)
-
-
-def load_shadow_status(store, run_id: str) -> str:
-    shadow_key = f"{run_id}/shadow.jsonl"
-    manifest_key = f"{run_id}/save_manifest.json"
-    if not store.exists(shadow_key):
-        if store.exists(manifest_key):
-            return "ok"
-        return "new"
-    last_event = None
-    content = store.read_text(shadow_key).splitlines()
-    for line in content:
-        if line.strip():
-            last_event = json.loads(line).get("event")
-    if last_event in ["stop_due_to_ambiguous_headers", "resume_guard_file_changed"]:
-        return "needs_confirmation"
-    if store.exists(manifest_key):
-        return "ok"
-    return last_event or "unknown"
-
-
-def _materialize_input(store, run_id: str, evidence: Dict[str, object]) -> Optional[str]:
-    artifact_key = evidence.get("input_artifact_key")
-    source_uri = evidence.get("source_uri")
-    cache_dir = os.path.join(tempfile.gettempdir(), "data-agents-dashboard", run_id)
-    if artifact_key:
-        store_key = artifact_key.split("artifacts/", 1)[1] if artifact_key.startswith("artifacts/") else artifact_key
-        if store.exists(store_key):
-            os.makedirs(cache_dir, exist_ok=True)
-            filename = os.path.basename(store_key) or "input"
-            local_path = os.path.join(cache_dir, filename)
-            with open(local_path, "wb") as handle:
-                handle.write(store.read_bytes(store_key))
-            return local_path
-    if source_uri and source_uri.startswith("file://"):
-        path = source_uri[len("file://") :]
-        if os.path.exists(path):
-            return path
-    if source_uri and os.path.isabs(source_uri) and os.path.exists(source_uri):
-        return source_uri
-    return None
+    return json_codec.loads(store.read_bytes(key))
 
 
-def load_dataframe_for_run(store, run_id: str, evidence: Dict[str, object]) -> Optional[pd.DataFrame]:
-    file_path = _materialize_input(store, run_id, evidence)
-    if not file_path:
+def _local_mtime(root: str, key: str = "") -> Optional[int]:
+    # Cache fingerprint for local roots; remote stores rely on the TTL instead.
+    if is_gcs_uri(root):
         return None
-    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        return os.stat(os.path.join(root, key)).st_mtime_ns
+    except OSError:
+        return None
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def list_runs(root: str, root_mtime: Optional[int] = None) -> List[str]:
+    return sorted(artifact_store(root).list_runs(), reverse=True)
+
+
+def run_index(root: str) -> Optional[Dict[str, set]]:
+    # Remote roots only: one listing per render serves the run list, statuses and run details.
+    # Local roots are cheaper through scandir and stat fingerprints, so they return None.
+    if not is_gcs_uri(root):
+        return None
+    cached = st.session_state.get("_artifact_index")
+    now = time.monotonic()
+    if cached and cached["root"] == root and now - cached["ts"] < INDEX_TTL_SECONDS:
+        return cached["index"]
+    index = artifact_index(artifact_store(root))
+    st.session_state["_artifact_index"] = {"root": root, "ts": now, "index": index}
+    return index
+
+
+def invalidate_run_index() -> None:
+    st.session_state.pop("_artifact_index", None)
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _remote_shadow_status(root: str, run_id: str, present: Optional[frozenset] = None) -> str:
+    return shadow_status(artifact_store(root), run_id, present)
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _remote_shadow_statuses(root: str, runs: tuple) -> Dict[str, str]:
+    return shadow_statuses(artifact_store(root), dict(runs))
+
+
+@st.cache_resource(show_spinner=False)
+def _status_cache() -> Dict[str, tuple]:
+    # Lives in the resource cache because module globals are reset on every script rerun.
+    return {}
+
+
+def load_shadow_status(root: str, run_id: str, present: Optional[set] = None) -> str:
+    if is_gcs_uri(root):
+        return _remote_shadow_status(root, run_id, frozenset(present) if present is not None else None)
+    # Only stat calls on the unchanged path; shadow.jsonl is re-read when its mtime/size moves.
+    fingerprint = (
+        artifact_fingerprint(root, f"{run_id}/shadow.jsonl"),
+        os.path.exists(os.path.join(root, run_id, "save_manifest.json")),
+    )
+    cache = _status_cache()
+    cache_key = os.path.join(root, run_id)
+    cached = cache.get(cache_key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    status = shadow_status(artifact_store(root), run_id)
+    cache[cache_key] = (fingerprint, status)
+    return status
+
+
+def load_shadow_statuses(root: str, run_ids: List[str], index: Optional[Dict[str, set]] = None) -> Dict[str, str]:
+    if index is None:
+        return {run_id: load_shadow_status(root, run_id) for run_id in run_ids}
+    runs = tuple((run_id, frozenset(index.get(run_id, ()))) for run_id in run_ids)
+    return _remote_shadow_statuses(root, runs)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _read_sheet(file_path: str, ext: str, sheet_name, mtime: float, nrows: Optional[int] = None) -> Optional[pd.DataFrame]:
+    # mtime is only part of the cache key so a rewritten input is re-parsed.
+    from runtime.table_reader import as_arrow_strings, read_csv_strings, read_excel
+
     if ext in [".xlsx", ".xls"]:
-        return pd.read_excel(file_path, sheet_name=evidence.get("sheet_name") or 0, header=None, dtype=str).fillna("")
+        return as_arrow_strings(read_excel(file_path, sheet_name=sheet_name, header=None, dtype=str, nrows=nrows))
     if ext == ".csv":
-        return pd.read_csv(file_path, header=None, dtype=str, keep_default_na=False).fillna("")
+        return as_arrow_strings(read_csv_strings(file_path, nrows=nrows))
     return None
 
 
-def count_rows(store, key: str) -> int:
+def load_dataframe_for_run(
+    store,
+    run_id: str,
+    evidence: Dict[str, object],
+    present: Optional[set] = None,
+    preview_rows: Optional[int] = PREVIEW_ROWS,
+) -> Optional[pd.DataFrame]:
+    # The schema builder only needs the top of the sheet; preview_rows=None loads everything.
+    cache_dir = os.path.join(tempfile.gettempdir(), "data-agents-dashboard", run_id)
+    file_path = materialize_input(store, evidence, cache_dir, present)
+    if not file_path:
+        return None
+    ext = os.path.splitext(file_path)[1].lower()
+    return _read_sheet(file_path, ext, evidence.get("sheet_name") or 0, os.path.getmtime(file_path), preview_rows)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def count_rows(root: str, key: str, fingerprint: Optional[tuple] = None) -> int:
+    store = artifact_store(root)
+    parquet_key = f"{os.path.splitext(key)[0]}.parquet"
+    if store.exists(parquet_key):
+        try:
+            import pyarrow.parquet as pq
+
+            # Row count comes from the Parquet footer; no row data is read.
+            with store.open_stream(parquet_key) as handle:
+                return pq.ParquetFile(handle).metadata.num_rows
+        except ImportError:
+            pass
     if not store.exists(key):
         return 0
-    text = store.read_text(key)
-    lines = text.splitlines()
-    return max(0, len(lines) - 1)
+    return max(0, store.count_lines(key) - 1)
 
 
 st.set_page_config(page_title="Puhemies Dashboard", page_icon="D", layout="wide")
@@ -124,18 +189,27 @@ tabs = st.tabs(["Runs", "Run Details"])
 
 with tabs[0]:
     st.subheader("Runs")
-    runs = list_runs(store)
+    root = artifacts_root()
+    index = run_index(root)
+    runs = sorted(index, reverse=True) if index is not None else list_runs(root, _local_mtime(root))
     if runs:
-        rows = [{"run_id": run_id, "status": load_shadow_status(store, run_id)} for run_id in runs]
+        statuses = load_shadow_statuses(root, runs, index)
+        rows = [{"run_id": run_id, "status": statuses[run_id]} for run_id in runs]
         st.table(rows)
         st.session_state.selected_run = st.selectbox("Open run", runs, index=0)
         if st.button("Clear Selected Run Outputs"):
             removed = False
-            for filename in ["clean.csv", "clean_data.csv", "extracted_metadata.json"]:
+            for filename in [
+                "clean.csv",
+                "clean.parquet",
+                "clean_data.csv",
+                "clean_data.parquet",
+                "extracted_metadata.json",
+            ]:
                 key = f"{st.session_state.selected_run}/output/{filename}"
-                if store.exists(key):
-                    store.write_bytes(key, b"", content_type="text/plain")
+                if store.delete(key):
                     removed = True
+            invalidate_run_index()
             if removed:
                 st.success("Outputs cleared for selected run.")
             else:
@@ -147,10 +221,11 @@ with tabs[0]:
     uploaded = st.file_uploader("Upload Excel or CSV", type=["xlsx", "xls", "csv"])
     run_id = st.text_input("Run id", value=datetime.utcnow().strftime("%Y%m%d-%H%M%S"))
     if uploaded and st.button("Run"):
-        file_path = os.path.join(uploads_dir(), f"{run_id}_{uploaded.name}")
-        with open(file_path, "wb") as handle:
-            handle.write(uploaded.getbuffer())
+        from runtime.excel_flow import puhemies_run_from_file
+
+        file_path = save_upload(uploaded, uploads_dir())
         response = puhemies_run_from_file(run_id, file_path, artifacts_root())
+        invalidate_run_index()
         st.session_state.selected_run = run_id
         st.session_state.response = response.to_dict()
         st.success("Run started.")
@@ -165,8 +240,14 @@ with tabs[1]:
         if response:
             st.info(response.get("message", ""))
 
-        evidence = load_json_from_store(store, f"{run_id}/evidence_packet.json")
-        status = load_shadow_status(store, run_id)
+        root = artifacts_root()
+        index = run_index(root)
+        if index is not None:
+            present = {f"{run_id}/{name}" for name in index.get(run_id, ())}
+        else:
+            present = set(store.list(f"{run_id}/"))
+        evidence = load_json_from_store(store, f"{run_id}/evidence_packet.json", present)
+        status = load_shadow_status(root, run_id, index.get(run_id, set()) if index is not None else None)
         if response and response.get("status"):
             status = response["status"]
         st.write(f"Status: {status}")
@@ -175,17 +256,29 @@ with tabs[1]:
             st.write(f"Structural hash: {evidence.get('structural_hash')}")
 
         initial_recipe = None
-        if store.exists(f"{run_id}/manual_recipe.json"):
-            initial_recipe = load_json_from_store(store, f"{run_id}/manual_recipe.json")
-        elif store.exists(f"{run_id}/proposed_recipe.json"):
-            initial_recipe = load_json_from_store(store, f"{run_id}/proposed_recipe.json")
+        if f"{run_id}/manual_recipe.json" in present:
+            initial_recipe = load_json_from_store(store, f"{run_id}/manual_recipe.json", present)
+        elif f"{run_id}/proposed_recipe.json" in present:
+            initial_recipe = load_json_from_store(store, f"{run_id}/proposed_recipe.json", present)
 
-        df_raw = load_dataframe_for_run(store, run_id, evidence)
         normalized_status = status
         if status == "needs_human_confirmation":
             normalized_status = "needs_confirmation"
 
+        df_raw = None
+        if normalized_status == "needs_confirmation":
+            full_sheet_key = f"full_sheet_{run_id}"
+            preview_rows = None if st.session_state.get(full_sheet_key) else PREVIEW_ROWS
+            df_raw = load_dataframe_for_run(store, run_id, evidence, present, preview_rows)
+            if df_raw is not None and preview_rows is not None and len(df_raw) >= preview_rows:
+                st.caption(f"Showing the first {preview_rows} rows of the source.")
+                if st.button("Load full sheet"):
+                    st.session_state[full_sheet_key] = True
+                    st.rerun()
+
         if normalized_status == "needs_confirmation" and df_raw is not None:
+            from simple_schema_builder import render_schema_builder
+
             st.subheader("Schema Builder (V6)")
             render_schema_builder(
                 df_raw=df_raw,
@@ -210,12 +303,16 @@ with tabs[1]:
                         if not has_columns:
                             st.warning("Add at least one Table Column field before saving the recipe.")
                         else:
-                            store.write_text(
+                            store.write_bytes(
                                 f"{run_id}/manual_recipe.json",
-                                json.dumps(payload, indent=2, ensure_ascii=True),
+                                json_codec.dumps(payload),
                                 content_type="application/json",
                             )
+                            from runtime.excel_flow import puhemies_continue
+
                             response_after = puhemies_continue(run_id, artifacts_root())
+                            invalidate_run_index()
+                            present = set(store.list(f"{run_id}/"))
                             st.session_state.response = response_after.to_dict()
                             st.success("Manual recipe saved. Run resumed.")
                     else:
@@ -226,14 +323,14 @@ with tabs[1]:
         clean_data_key = f"{run_id}/output/clean_data.csv"
         clean_key = f"{run_id}/output/clean.csv"
         metadata_key = f"{run_id}/output/extracted_metadata.json"
-        if store.exists(clean_data_key) or store.exists(clean_key):
+        if clean_data_key in present or clean_key in present:
             st.subheader("Outputs")
-        if store.exists(clean_data_key):
+        if clean_data_key in present:
             st.write(f"Table: {store.uri_for_key(clean_data_key)}")
-            st.write(f"Rows written: {count_rows(store, clean_data_key)}")
+            st.write(f"Rows written: {count_rows(root, clean_data_key, artifact_fingerprint(root, clean_data_key))}")
             st.caption("Note: outputs persist across reruns; clear artifacts to regenerate.")
-        if store.exists(clean_key):
+        if clean_key in present:
             st.write(f"Table: {store.uri_for_key(clean_key)}")
-            st.write(f"Rows written: {count_rows(store, clean_key)}")
-        if store.exists(metadata_key):
+            st.write(f"Rows written: {count_rows(root, clean_key, artifact_fingerprint(root, clean_key))}")
+        if metadata_key in present:
             st.write(f"Metadata: {store.uri_for_key(metadata_key)}")
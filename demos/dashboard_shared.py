@@ -0,0 +1,142 @@
+import hashlib
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Dict, Mapping, Optional, Set
+
+import streamlit as st
+
+from runtime import json_codec
+from runtime.artifact_store import build_artifact_store, count_stream_lines, file_fingerprint, is_gcs_uri
+
+NEEDS_CONFIRMATION_EVENTS = ("stop_due_to_ambiguous_headers", "resume_guard_file_changed")
+_EVENT_FIELD = re.compile(rb'"event"\s*:\s*"([^"\\]*)"')
+
+
+@st.cache_resource(show_spinner=False)
+def store_for_root(root: str):
+    # One backend client per root, shared across reruns, sessions and both demo apps.
+    return build_artifact_store(root)
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_dir(path: str) -> str:
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def artifact_fingerprint(root: str, key: str) -> Optional[tuple]:
+    # Cache fingerprint for local roots; remote stores rely on the TTL instead.
+    if is_gcs_uri(root):
+        return None
+    return file_fingerprint(os.path.join(root, key))
+
+
+def artifact_index(store) -> Dict[str, Set[str]]:
+    """
+    Groups every key under the store root by run id, e.g. {"run_a": {"shadow.jsonl", "output/clean.csv"}}.
+    """
+    index: Dict[str, Set[str]] = {}
+    for key in store.list(""):
+        run_id, sep, rest = key.partition("/")
+        if sep and run_id:
+            index.setdefault(run_id, set()).add(rest)
+    return index
+
+
+def last_event(line: bytes) -> Optional[str]:
+    """
+    Extracts the "event" value from one shadow.jsonl line with a byte search, falling back to a
+    full JSON parse when the first "event" key is not followed by a plain (unescaped) string.
+    """
+    if not line:
+        return None
+    match = _EVENT_FIELD.search(line)
+    if match and match.start() == line.find(b'"event"'):
+        return match.group(1).decode("utf-8")
+    return json_codec.loads(line).get("event")
+
+
+def shadow_status(store, run_id: str, present: Optional[AbstractSet[str]] = None) -> str:
+    # present: run-relative keys from artifact_index, used instead of exists() round-trips.
+    def has(name: str) -> bool:
+        if present is not None:
+            return name in present
+        return store.exists(f"{run_id}/{name}")
+
+    if not has("shadow.jsonl"):
+        if has("save_manifest.json"):
+            return "ok"
+        return "new"
+    event = last_event(store.read_last_line(f"{run_id}/shadow.jsonl"))
+    if event in NEEDS_CONFIRMATION_EVENTS:
+        return "needs_confirmation"
+    if has("save_manifest.json"):
+        return "ok"
+    return event or "unknown"
+
+
+def shadow_statuses(store, present_by_run: Mapping[str, AbstractSet[str]], max_workers: int = 16) -> Dict[str, str]:
+    """
+    Status for many runs at once: presence checks come from the index, and the remaining
+    shadow.jsonl tail reads are issued concurrently instead of one round-trip after another.
+    """
+    if not present_by_run:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(present_by_run))) as pool:
+        futures = {
+            run_id: pool.submit(shadow_status, store, run_id, present)
+            for run_id, present in present_by_run.items()
+        }
+    return {run_id: future.result() for run_id, future in futures.items()}
+
+
+def materialize_input(
+    store,
+    evidence: Dict[str, object],
+    cache_dir: str,
+    present: Optional[set] = None,
+) -> Optional[str]:
+    """
+    Returns a local path for the run input, copying the stored input artifact into cache_dir when
+    needed. An existing copy is reused when its size matches the stored object.
+    """
+    artifact_key = evidence.get("input_artifact_key")
+    source_uri = evidence.get("source_uri")
+    if artifact_key:
+        store_key = artifact_key.split("artifacts/", 1)[1] if artifact_key.startswith("artifacts/") else artifact_key
+        if (store_key in present) if present is not None else store.exists(store_key):
+            os.makedirs(cache_dir, exist_ok=True)
+            local_path = os.path.join(cache_dir, os.path.basename(store_key) or "input")
+            if os.path.exists(local_path) and os.path.getsize(local_path) == store.size(store_key):
+                return local_path
+            with store.open_stream(store_key) as source, open(local_path, "wb") as handle:
+                shutil.copyfileobj(source, handle, length=1 << 20)
+            return local_path
+    if source_uri and source_uri.startswith("file://"):
+        path = source_uri[len("file://") :]
+        if os.path.exists(path):
+            return path
+    if source_uri and os.path.isabs(source_uri) and os.path.exists(source_uri):
+        return source_uri
+    return None
+
+
+def save_upload(uploaded, directory: str) -> str:
+    """
+    Writes an uploaded file to directory under a content-hash name and returns the path.
+    Re-submitting the same bytes reuses the existing file instead of writing it again.
+    """
+    data = uploaded.getbuffer()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    path = os.path.join(directory, f"{digest}_{os.path.basename(uploaded.name)}")
+    if not (os.path.exists(path) and os.path.getsize(path) == data.nbytes):
+        with open(path, "wb") as handle:
+            handle.write(data)
+    return path
+
+
+def count_file_lines(path: str) -> int:
+    with open(path, "rb") as handle:
+        return count_stream_lines(handle)
@@ -1,7 +1,8 @@
 import ast
-import json
+import io
 import os
 import sys
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 import pandas as pd
@@ -11,11 +12,15 @@ REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
+from runtime import json_codec
 from runtime.data_investigator import scan_dataframe_structure, get_column_inventory_from_df
+from runtime.table_reader import as_arrow_strings, read_csv_strings, read_excel
 
 DATA_TYPES = ["string", "number", "date"]
+PREVIEW_ROWS = 2000
 
 
+@lru_cache(maxsize=16384)
 def get_excel_col_name(n: int) -> str:
     n = int(n) if n is not None else 0
     name = ""
@@ -25,12 +30,27 @@ def get_excel_col_name(n: int) -> str:
     return name
 
 
+@lru_cache(maxsize=32)
+def _excel_names_for(width: int) -> tuple:
+    return tuple(get_excel_col_name(idx) for idx in range(width))
+
+
+@lru_cache(maxsize=1024)
+def _parse_pointer_str(pointer: str) -> object:
+    try:
+        return ast.literal_eval(pointer)
+    except Exception:
+        return pointer
+
+
 def _sanitize_source_pointer(pointer: object) -> object:
+    # The data editor hands dict pointers back as their repr; parse each distinct string once.
+    if isinstance(pointer, dict):
+        return pointer
     if isinstance(pointer, str) and pointer.strip().startswith("{") and "row" in pointer:
-        try:
-            return ast.literal_eval(pointer)
-        except Exception:
-            return pointer
+        parsed = _parse_pointer_str(pointer)
+        # Copy so callers never mutate the cached object.
+        return dict(parsed) if isinstance(parsed, dict) else parsed
     return pointer
 
 
@@ -89,101 +109,111 @@ def _recipe_from_schema_list(
     return payload
 
 
+def _schema_fingerprint(
+    schema_list: List[dict],
+    header_row_index: Optional[int],
+    merge_metadata_fields: List[str],
+) -> tuple:
+    # Hashable snapshot of everything the recipe payload is built from.
+    rows = tuple(
+        (
+            item.get("target_name"),
+            item.get("source_type"),
+            repr(item.get("source_pointer")),
+            item.get("data_type"),
+        )
+        for item in schema_list
+    )
+    return rows, header_row_index, tuple(merge_metadata_fields)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _parse_upload(name: str, data: bytes) -> pd.DataFrame:
+    buffer = io.BytesIO(data)
+    if name.lower().endswith(".csv"):
+        # pyarrow tokenizer; string columns arrive Arrow-backed with no per-cell str objects.
+        return as_arrow_strings(read_csv_strings(buffer))
+    return as_arrow_strings(read_excel(buffer, header=None, dtype=str))
+
+
 def _load_dataframe_from_upload(uploaded_file: object) -> Optional[pd.DataFrame]:
     if not uploaded_file:
         return None
-    name = getattr(uploaded_file, "name", "")
-    if name.lower().endswith(".csv"):
-        df = pd.read_csv(uploaded_file, header=None, dtype=str, keep_default_na=False)
-    else:
-        df = pd.read_excel(uploaded_file, header=None, dtype=str)
-    return df.fillna("")
+    # Keyed on name + bytes so widget reruns reuse the parsed frame.
+    return _parse_upload(getattr(uploaded_file, "name", ""), uploaded_file.getvalue())
 
 
-def render_schema_builder(
-    df_raw: Optional[pd.DataFrame] = None,
-    initial_recipe: Optional[Dict[str, object]] = None,
-    run_id: Optional[str] = None,
-    show_uploader: bool = True,
-    allow_download: bool = True,
-    use_page_config: bool = False,
-    return_payload_on_submit: bool = True,
-    show_submit_button: bool = True,
-) -> Optional[Dict[str, object]]:
-    if use_page_config:
-        st.set_page_config(layout="wide", page_title="Schema Builder V6.2")
-    st.title("Schema Builder V6.2")
-    st.caption(
-        "Use Metadata for single cells (titles/dates) and Table Columns for data headers."
-    )
+@st.cache_data(max_entries=4, show_spinner=False)
+def _suggest_header_row(df_raw: pd.DataFrame) -> int:
+    return int(scan_dataframe_structure(df_raw))
 
-    if "schema_list" not in st.session_state:
-        st.session_state.schema_list = []
-    if "target_field_name" not in st.session_state:
-        st.session_state.target_field_name = ""
-    if "last_click_hash" not in st.session_state:
-        st.session_state.last_click_hash = ""
-    if "header_row_index" not in st.session_state:
-        st.session_state.header_row_index = 0
-    if "merge_metadata_fields" not in st.session_state:
-        st.session_state.merge_metadata_fields = []
-    if "schema_builder_run_id" not in st.session_state:
-        st.session_state.schema_builder_run_id = None
-    if "selected_row_idx" not in st.session_state:
-        st.session_state.selected_row_idx = None
-    if "selected_col_idx" not in st.session_state:
-        st.session_state.selected_col_idx = 0
-    if "schema_builder_recipe" not in st.session_state:
-        st.session_state.schema_builder_recipe = None
-    if "schema_builder_has_fields" not in st.session_state:
-        st.session_state.schema_builder_has_fields = False
 
-    if run_id and st.session_state.schema_builder_run_id != run_id:
-        st.session_state.schema_builder_run_id = run_id
-        st.session_state.schema_list = []
-        st.session_state.target_field_name = ""
-        st.session_state.last_click_hash = ""
-        st.session_state.header_row_index = 0
-        st.session_state.merge_metadata_fields = []
-        st.session_state.selected_row_idx = None
-        st.session_state.selected_col_idx = 0
-        st.session_state.schema_builder_recipe = None
-        st.session_state.schema_builder_has_fields = False
+@st.cache_data(max_entries=16, show_spinner=False)
+def _column_inventory(header_values: tuple, sample_row: tuple) -> List[dict]:
+    return get_column_inventory_from_df(pd.DataFrame([list(sample_row)], columns=list(header_values)))
 
-    if initial_recipe and not st.session_state.schema_list:
-        st.session_state.schema_list = _schema_list_from_recipe(initial_recipe)
-        st.session_state.header_row_index = int(initial_recipe.get("header_row_index", 0))
-        st.session_state.merge_metadata_fields = initial_recipe.get("merge_metadata_fields", [])
 
-    if df_raw is None and show_uploader:
-        uploaded_file = st.file_uploader("Upload Excel or CSV", type=["xlsx", "xls", "csv"])
-        df_raw = _load_dataframe_from_upload(uploaded_file)
+def _field(name: str, source_type: str, source_pointer: object, target_type: str = "string") -> dict:
+    return {
+        "target_name": name,
+        "source_type": source_type,
+        "source_pointer": source_pointer,
+        "data_type": target_type,
+    }
 
-    if df_raw is None:
-        st.info("Upload a file to begin.")
-        return None
 
-    def add_field(name: str, source_type: str, source_pointer: object, target_type: str = "string") -> None:
-        for item in st.session_state.schema_list:
-            if item["target_name"] == name:
-                st.warning(f"Field '{name}' already exists.")
-                return
+def _set_schema_list(schema_list: List[dict]) -> None:
+    # schema_names mirrors the target names in schema_list for O(1) duplicate checks.
+    st.session_state.schema_list = schema_list
+    st.session_state.schema_names = {item.get("target_name") for item in schema_list}
 
-        st.session_state.schema_list.append(
-            {
-                "target_name": name,
-                "source_type": source_type,
-                "source_pointer": source_pointer,
-                "data_type": target_type,
-            }
-        )
+
+def _add_field(name: str, source_type: str, source_pointer: object, target_type: str = "string") -> bool:
+    if name in st.session_state.schema_names:
+        return False
+
+    st.session_state.schema_names.add(name)
+    st.session_state.schema_list.append(_field(name, source_type, source_pointer, target_type))
+    return True
+
+
+def _recipe_state() -> tuple:
+    return len(st.session_state.schema_list), st.session_state.header_row_index
+
+
+def _request_app_rerun() -> None:
+    st.session_state.schema_builder_app_rerun = True
+
+
+@st.fragment
+def _selection_panel(df_raw: pd.DataFrame) -> None:
+    """
+    Grid selection and the add-to-recipe controls. Clicks rerun only this fragment; when a click
+    changes the recipe or header row, the whole app reruns so the sections below catch up.
+    """
+    recipe_state = _recipe_state()
+    notices: List[tuple] = []
+
+    def notify(kind: str, text: str) -> None:
+        notices.append((kind, text))
+        getattr(st, kind)(text)
 
     col_preview, col_builder = st.columns([2, 1])
 
     with col_preview:
         st.subheader("1. Select Row/Cell")
+        # Only a head slice is sent to the browser; selections index df_raw positionally.
+        preview_n = len(df_raw)
+        if len(df_raw) > PREVIEW_ROWS:
+            preview_n = st.slider(
+                "Preview rows",
+                min_value=PREVIEW_ROWS,
+                max_value=len(df_raw),
+                value=PREVIEW_ROWS,
+                key="schema_builder_preview_rows",
+            )
         event = st.dataframe(
-            df_raw,
+            df_raw.head(preview_n),
             use_container_width=True,
             on_select="rerun",
             selection_mode=["single-row", "single-column"],
@@ -206,18 +236,16 @@ def render_schema_builder(
             st.divider()
             st.markdown(f"**Refine Selection for Row {selected_row_idx}:**")
 
-            col_options = []
             try:
-                row_values = df_raw.iloc[selected_row_idx].tolist()
+                row_values = df_raw.iloc[selected_row_idx].astype(str).fillna("")
             except IndexError:
-                row_values = []
+                row_values = pd.Series([], dtype=str)
 
-            for idx, val in enumerate(row_values):
-                col_name = get_excel_col_name(idx)
-                s_val = str(val)
-                preview = s_val[:30] + "..." if len(s_val) > 30 else s_val
-                label = f"Col {col_name}: {preview}"
-                col_options.append(label)
+            # Truncation runs as one vectorized string pass instead of a Python loop per cell.
+            previews = row_values.where(row_values.str.len() <= 30, row_values.str.slice(0, 30) + "...")
+            excel_names = _excel_names_for(df_raw.shape[1])
+            col_options = [f"Col {name}: {preview}" for name, preview in zip(excel_names, previews.tolist())]
+            label_to_idx = {label: idx for idx, label in enumerate(col_options)}
 
             safe_index = selected_col_idx if 0 <= selected_col_idx < len(col_options) else 0
 
@@ -227,7 +255,7 @@ def render_schema_builder(
                 index=safe_index,
             )
 
-            final_col_idx = col_options.index(selected_col_label) if selected_col_label in col_options else 0
+            final_col_idx = label_to_idx.get(selected_col_label, 0)
 
             try:
                 final_value = str(df_raw.iloc[selected_row_idx, final_col_idx])
@@ -241,12 +269,14 @@ def render_schema_builder(
 
     with col_builder:
         st.subheader("2. Add to Recipe")
+        for kind, text in st.session_state.pop("schema_builder_notices", []):
+            getattr(st, kind)(text)
         tab_meta, tab_cols = st.tabs(["Metadata (Titles/Dates)", "Table Columns (Data)"])
 
         with tab_meta:
             st.info("Extract one value from this exact cell.")
             if selected_row_idx is not None:
-                coord_name = f"{get_excel_col_name(final_col_idx)}{selected_row_idx + 1}"
+                coord_name = f"{excel_names[final_col_idx]}{selected_row_idx + 1}"
                 st.write(f"Cell: **{coord_name}**")
                 st.write(f"Value: `{final_value}`")
 
@@ -259,8 +289,10 @@ def render_schema_builder(
             if st.button("Add Metadata Field", disabled=(selected_row_idx is None)):
                 if name_input:
                     pointer = {"row": int(selected_row_idx), "col": int(final_col_idx)}
-                    add_field(name_input, "metadata", pointer)
-                    st.success(f"Added '{name_input}'")
+                    if _add_field(name_input, "metadata", pointer):
+                        notify("success", f"Added '{name_input}'")
+                    else:
+                        notify("warning", f"Field '{name_input}' already exists.")
 
         with tab_cols:
             st.info("Extract all data below this row.")
@@ -268,37 +300,115 @@ def render_schema_builder(
                 st.write(f"Header Row: **{selected_row_idx}**")
                 if st.button("Import Columns from Row"):
                     st.session_state.header_row_index = int(selected_row_idx)
-                    potential_headers = df_raw.iloc[selected_row_idx].tolist()
-                    count = 0
-                    for h_name in potential_headers:
-                        h_name = str(h_name).strip()
-                        if h_name and "Unnamed" not in h_name:
-                            add_field(h_name, "column", h_name)
-                            count += 1
-                    st.success(f"Imported {count} columns")
+                    headers = df_raw.iloc[selected_row_idx].fillna("").astype(str).str.strip()
+                    headers = headers[headers.ne("") & ~headers.str.contains("Unnamed", regex=False)]
+                    existing = st.session_state.schema_names
+                    added = []
+                    for h_name in headers.tolist():
+                        if h_name in existing:
+                            notify("warning", f"Field '{h_name}' already exists.")
+                            continue
+                        existing.add(h_name)
+                        added.append(_field(h_name, "column", h_name))
+                    st.session_state.schema_list.extend(added)
+                    notify("success", f"Imported {len(added)} columns")
             else:
                 st.warning("Select a row on the left.")
 
         if st.button("Scan for Header Row"):
-            suggested = scan_dataframe_structure(df_raw)
-            st.session_state.header_row_index = int(suggested)
-            st.success(f"Suggested header row: {suggested}")
+            suggested = _suggest_header_row(df_raw)
+            st.session_state.header_row_index = suggested
+            notify("success", f"Suggested header row: {suggested}")
         st.number_input(
             "Header row index (0-based)",
             min_value=0,
             value=int(st.session_state.header_row_index),
             key="header_row_index",
+            on_change=_request_app_rerun,
         )
 
+    if st.session_state.pop("schema_builder_app_rerun", False) or _recipe_state() != recipe_state:
+        # The recipe view and column inventory live outside this fragment; notices survive the rerun.
+        st.session_state.schema_builder_notices = notices
+        st.rerun()
+
+
+def render_schema_builder(
+    df_raw: Optional[pd.DataFrame] = None,
+    initial_recipe: Optional[Dict[str, object]] = None,
+    run_id: Optional[str] = None,
+    show_uploader: bool = True,
+    allow_download: bool = True,
+    use_page_config: bool = False,
+    return_payload_on_submit: bool = True,
+    show_submit_button: bool = True,
+) -> Optional[Dict[str, object]]:
+    if use_page_config:
+        st.set_page_config(layout="wide", page_title="Schema Builder V6.2")
+    st.title("Schema Builder V6.2")
+    st.caption(
+        "Use Metadata for single cells (titles/dates) and Table Columns for data headers."
+    )
+
+    if "schema_list" not in st.session_state or "schema_names" not in st.session_state:
+        _set_schema_list(st.session_state.get("schema_list", []))
+    if "target_field_name" not in st.session_state:
+        st.session_state.target_field_name = ""
+    if "last_click_hash" not in st.session_state:
+        st.session_state.last_click_hash = ""
+    if "header_row_index" not in st.session_state:
+        st.session_state.header_row_index = 0
+    if "merge_metadata_fields" not in st.session_state:
+        st.session_state.merge_metadata_fields = []
+    if "schema_builder_run_id" not in st.session_state:
+        st.session_state.schema_builder_run_id = None
+    if "selected_row_idx" not in st.session_state:
+        st.session_state.selected_row_idx = None
+    if "selected_col_idx" not in st.session_state:
+        st.session_state.selected_col_idx = 0
+    if "schema_builder_recipe" not in st.session_state:
+        st.session_state.schema_builder_recipe = None
+    if "schema_builder_has_fields" not in st.session_state:
+        st.session_state.schema_builder_has_fields = False
+
+    if run_id and st.session_state.schema_builder_run_id != run_id:
+        st.session_state.schema_builder_run_id = run_id
+        _set_schema_list([])
+        st.session_state.target_field_name = ""
+        st.session_state.last_click_hash = ""
+        st.session_state.header_row_index = 0
+        st.session_state.merge_metadata_fields = []
+        st.session_state.selected_row_idx = None
+        st.session_state.selected_col_idx = 0
+        st.session_state.schema_builder_recipe = None
+        st.session_state.schema_builder_has_fields = False
+
+    if initial_recipe and not st.session_state.schema_list:
+        _set_schema_list(_schema_list_from_recipe(initial_recipe))
+        st.session_state.header_row_index = int(initial_recipe.get("header_row_index", 0))
+        st.session_state.merge_metadata_fields = initial_recipe.get("merge_metadata_fields", [])
+
+    if df_raw is None and show_uploader:
+        uploaded_file = st.file_uploader("Upload Excel or CSV", type=["xlsx", "xls", "csv"])
+        df_raw = _load_dataframe_from_upload(uploaded_file)
+
+    if df_raw is None:
+        st.info("Upload a file to begin.")
+        return None
+
+    _selection_panel(df_raw)
+
     if df_raw is not None and df_raw.shape[1] > 20:
         header_row = st.session_state.header_row_index
         if 0 <= header_row < len(df_raw):
-            header_values = df_raw.iloc[header_row].tolist()
-            sample_row = df_raw.iloc[header_row + 1] if header_row + 1 < len(df_raw) else []
-            temp_df = pd.DataFrame([sample_row], columns=header_values)
-            inventory = get_column_inventory_from_df(temp_df)
-            st.subheader("Column Inventory")
-            st.dataframe(inventory, use_container_width=True, height=300)
+            # A state-tracking expander reports .open, so the inventory is only built while it is shown.
+            inventory_panel = st.expander("Column Inventory", key="schema_builder_inventory", on_change="rerun")
+            with inventory_panel:
+                if inventory_panel.open:
+                    header_values = tuple(df_raw.iloc[header_row].tolist())
+                    sample_row = tuple(df_raw.iloc[header_row + 1].tolist()) if header_row + 1 < len(df_raw) else ()
+                    inventory = _column_inventory(header_values, sample_row)
+                    st.dataframe(inventory, use_container_width=True, height=300)
 
     st.divider()
     st.subheader("3. Current Recipe")
@@ -307,6 +417,7 @@ def render_schema_builder(
             st.session_state.schema_list,
             num_rows="dynamic",
             use_container_width=True,
+            key="schema_editor",
             column_config={
                 "source_type": st.column_config.SelectboxColumn(
                     "source_type",
@@ -320,7 +431,7 @@ def render_schema_builder(
                 )
             },
         )
-        st.session_state.schema_list = edited
+        _set_schema_list(edited)
 
         metadata_targets = [
             row.get("target_name")
@@ -334,12 +445,25 @@ def render_schema_builder(
         )
         st.session_state.merge_metadata_fields = merge_selected
 
-        recipe_payload = _recipe_from_schema_list(
+        # Rebuilt only when the editor rows, header row or merge fields change; the download
+        # JSON is invalidated alongside.
+        fingerprint = _schema_fingerprint(
             edited,
             st.session_state.header_row_index,
             st.session_state.merge_metadata_fields,
         )
-        st.session_state.schema_builder_recipe = recipe_payload
+        if (
+            st.session_state.schema_builder_recipe is None
+            or st.session_state.get("schema_builder_recipe_fingerprint") != fingerprint
+        ):
+            st.session_state.schema_builder_recipe = _recipe_from_schema_list(
+                edited,
+                st.session_state.header_row_index,
+                st.session_state.merge_metadata_fields,
+            )
+            st.session_state.schema_builder_recipe_fingerprint = fingerprint
+            st.session_state.schema_builder_recipe_json = None
+        recipe_payload = st.session_state.schema_builder_recipe
         st.session_state.schema_builder_has_fields = True
 
         submitted_payload = None
@@ -349,9 +473,11 @@ def render_schema_builder(
                 st.success("Manual recipe prepared.")
 
         if allow_download:
+            if st.session_state.get("schema_builder_recipe_json") is None:
+                st.session_state.schema_builder_recipe_json = json_codec.dumps(recipe_payload)
             st.download_button(
                 "Download Manual Recipe JSON",
-                json.dumps(recipe_payload, indent=2),
+                st.session_state.schema_builder_recipe_json,
                 "manual_recipe.json",
                 "application/json",
             )
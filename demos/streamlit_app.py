@@ -1,15 +1,20 @@
 import os
+import shutil
 import sys
 from datetime import datetime
+from typing import Optional
 
 import streamlit as st
 
-from runtime.artifact_store import build_artifact_store
-from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
-
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEMOS_ROOT = os.path.join(REPO_ROOT, "demos")
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
+if DEMOS_ROOT not in sys.path:
+    sys.path.insert(0, DEMOS_ROOT)
+
+from dashboard_shared import artifact_fingerprint, store_for_root
+from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
 
 
 def repo_root() -> str:
@@ -21,7 +26,7 @@ def artifacts_root() -> str:
 
 
 def artifact_store():
-    return build_artifact_store(artifacts_root())
+    return store_for_root(artifacts_root())
 
 
 def uploads_dir() -> str:
@@ -30,12 +35,12 @@ def uploads_dir() -> str:
     return path
 
 
-def count_rows_from_store(store, key: str) -> int:
+@st.cache_data(ttl=30, show_spinner=False)
+def count_rows_from_store(root: str, key: str, fingerprint: Optional[tuple] = None) -> int:
+    store = store_for_root(root)
     if not store.exists(key):
         return 0
-    text = store.read_text(key)
-    lines = text.splitlines()
-    return max(0, len(lines) - 1)
+    return max(0, store.count_lines(key) - 1)
 
 
 st.set_page_config(page_title="Data Agents Demo", page_icon="D")
@@ -53,8 +58,9 @@ if uploaded:
     run_id = st.text_input("Run id", value=st.session_state.run_id or datetime.utcnow().strftime("%Y%m%d-%H%M%S"))
     if st.button("Run"):
         file_path = os.path.join(uploads_dir(), f"{run_id}_{uploaded.name}")
-        with open(file_path, "wb") as handle:
-            handle.write(uploaded.getbuffer())
+        uploaded.seek(0)
+        with open(file_path, "wb", buffering=1 << 20) as handle:
+            shutil.copyfileobj(uploaded, handle, length=1 << 20)
         response = puhemies_run_from_file(run_id, file_path, artifacts_root())
         st.session_state.run_id = run_id
         st.session_state.response = response.to_dict()
@@ -88,6 +94,9 @@ if st.session_state.response:
         st.success("Run completed.")
         if store.exists(output_key):
             st.write(f"Output: {store.uri_for_key(output_key)}")
-            st.write(f"Rows written: {count_rows_from_store(store, output_key)}")
+            rows_written = count_rows_from_store(
+                artifacts_root(), output_key, artifact_fingerprint(artifacts_root(), output_key)
+            )
+            st.write(f"Rows written: {rows_written}")
         else:
             st.write("Output not found yet.")
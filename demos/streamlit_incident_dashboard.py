@@ -1,16 +1,25 @@
 import os
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
 import streamlit as st
 
-from runtime.artifact_store import build_artifact_store
-from runtime.run_pointer import get_latest_run_id
-
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEMOS_ROOT = os.path.join(REPO_ROOT, "demos")
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
+if DEMOS_ROOT not in sys.path:
+    sys.path.insert(0, DEMOS_ROOT)
+
+from dashboard_shared import store_for_root
+from runtime import json_codec
+from runtime.run_pointer import get_latest_run_id
+
+# Artifact loaders are keyed on the object's store version, so files that appear or are rewritten while
+# the worker runs are picked up on the next rerun; the TTL only bounds how long stale entries are kept.
+ARTIFACT_TTL_SECONDS = 300
+STATUS_TTL_SECONDS = 5
 
 
 def artifacts_root() -> str:
@@ -18,50 +27,86 @@ def artifacts_root() -> str:
 
 
 def artifact_store():
-    return build_artifact_store(artifacts_root())
+    return store_for_root(artifacts_root())
 
 
-def _available_runs(store) -> List[str]:
-    runs = store.list_runs()
+@st.cache_data(ttl=STATUS_TTL_SECONDS, show_spinner=False)
+def _available_runs(root: str) -> List[str]:
+    store = store_for_root(root)
+    runs = store.list_runs()  # already sorted by the store
     if runs:
         return runs
-    legacy = set()
-    for key in store.list():
-        if "/" in key:
-            legacy.add(key.split("/")[0])
-    return sorted(list(legacy))
+    return sorted({key.split("/", 1)[0] for key in store.list() if "/" in key})
 
 
 def _load_json(store, key: str) -> Dict:
     if not store.exists(key):
         return {}
-    import json
+    return json_codec.loads(store.read_bytes(key))
+
+
+def _fleet_key(run_id: str) -> str:
+    return f"{run_id}/fleet_summary.json"
+
+
+def _artifact_version(root: str, key: str) -> Optional[object]:
+    return store_for_root(root).version(key)
 
-    return json.loads(store.read_text(key))
 
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _fleet_summary(root: str, run_id: str, version: Optional[object]) -> Dict:
+    return _load_json(store_for_root(root), _fleet_key(run_id))
 
-def _fleet_summary(store, run_id: str) -> Dict:
-    return _load_json(store, f"{run_id}/fleet_summary.json")
 
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _cluster_index(root: str, run_id: str, version: Optional[object]) -> Dict[str, Dict]:
+    return {c.get("signature_hash"): c for c in _fleet_summary(root, run_id, version).get("clusters", [])}
 
-def _timeline(store, run_id: str, host_id: str) -> Dict:
-    return _load_json(store, f"{run_id}/hosts/{host_id}/timeline.json")
 
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _host_meta_index(root: str, run_id: str, version: Optional[object]) -> Dict[str, Dict]:
+    index: Dict[str, Dict] = {}
+    for host in _fleet_summary(root, run_id, version).get("top_hosts", []):
+        # First entry wins, as with the previous linear scan.
+        index.setdefault(host.get("host_id"), host)
+    return index
 
-def _host_options(store, run_id: str, fleet: Dict) -> List[str]:
-    opts = [h["host_id"] for h in fleet.get("top_hosts", [])]
-    for key in store.list(f"{run_id}/hosts"):
-        parts = key.split("/")
-        if len(parts) >= 3:
-            opts.append(parts[2])
-    return sorted(list(set(opts)))
 
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _timeline(root: str, key: str, version: Optional[object]) -> Dict:
+    return _load_json(store_for_root(root), key)
 
-def _run_status(store, run_id: str) -> Dict:
-    key = f"{run_id}/run_status.json"
-    if store.exists(key):
-        return _load_json(store, key)
-    return {}
+
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _host_options(root: str, run_id: str, version: Optional[object], status_version: Optional[object]) -> List[str]:
+    # Host directories are written before fleet_summary.json and the final run status, so those two
+    # versions change whenever the listing can.
+    store = store_for_root(root)
+    fleet = _fleet_summary(root, run_id, version)
+    # dict.fromkeys dedupes in a single pass; one sort at the end orders the selectbox.
+    opts = dict.fromkeys(h["host_id"] for h in fleet.get("top_hosts", []))
+    # Host directories only; the per-host artifacts underneath are not listed.
+    opts.update(dict.fromkeys(store.list_top_level(f"{run_id}/hosts")))
+    return sorted(opts)
+
+
+@st.cache_data(ttl=STATUS_TTL_SECONDS, show_spinner=False)
+def _run_status(root: str, run_id: str) -> Dict:
+    return _load_json(store_for_root(root), f"{run_id}/run_status.json")
+
+
+@st.cache_data(ttl=ARTIFACT_TTL_SECONDS, show_spinner=False)
+def _read_text(root: str, key: str, version: Optional[object]) -> Optional[str]:
+    store = store_for_root(root)
+    if not store.exists(key):
+        return None
+    return store.read_text(key)
+
+
+def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index)
 
 
 def render_fleet_tab(fleet: Dict):
@@ -79,32 +124,39 @@ def render_fleet_tab(fleet: Dict):
     st.metric(label="Overall risk", value=fleet.get("overall_risk_score", 0))
 
     st.subheader("Top impacted hosts")
-    hosts = fleet.get("top_hosts", [])
-    if host_search:
-        hosts = [h for h in hosts if host_search.lower() in h.get("host_id", "").lower() or host_search.lower() in str(h.get("user_id", "")).lower()]
-    hosts = [h for h in hosts if h.get("score", 0) >= min_severity]
-    if hosts:
-        df_hosts = pd.DataFrame(hosts)
+    df_hosts = pd.DataFrame(fleet.get("top_hosts", []))
+    if not df_hosts.empty:
+        mask = _column(df_hosts, "score", 0).fillna(0).ge(min_severity)
+        if host_search:
+            host_ids = _column(df_hosts, "host_id", "").fillna("").astype(str)
+            user_ids = _column(df_hosts, "user_id", "").fillna("").astype(str)
+            mask &= host_ids.str.contains(host_search, case=False, regex=False) | user_ids.str.contains(
+                host_search, case=False, regex=False
+            )
+        df_hosts = df_hosts[mask]
+    if not df_hosts.empty:
         st.dataframe(df_hosts)
     else:
         st.write("No hosts found for this run.")
 
     st.subheader("Clusters")
-    clusters = fleet.get("clusters", [])
-    if status_filter != "all":
-        clusters = [c for c in clusters if c.get("status") == status_filter]
-    if selected_types:
-        clusters = [c for c in clusters if c.get("type") in selected_types]
-    clusters = [c for c in clusters if c.get("affected_hosts", 0) >= min_hosts]
-    if clusters:
-        df_clusters = pd.DataFrame(clusters)
+    df_clusters = pd.DataFrame(fleet.get("clusters", []))
+    if not df_clusters.empty:
+        mask = _column(df_clusters, "affected_hosts", 0).fillna(0).ge(min_hosts)
+        if status_filter != "all":
+            mask &= _column(df_clusters, "status", None).eq(status_filter)
+        if selected_types:
+            mask &= _column(df_clusters, "type", None).isin(selected_types)
+        df_clusters = df_clusters[mask]
+    if not df_clusters.empty:
         st.dataframe(df_clusters)
     else:
         st.write("No clusters detected.")
 
 
-def render_host_tab(store, run_id: str, host_id: str):
-    timeline = _timeline(store, run_id, host_id)
+def render_host_tab(root: str, run_id: str, host_id: str, fleet_version: Optional[object]):
+    timeline_key = f"{run_id}/hosts/{host_id}/timeline.json"
+    timeline = _timeline(root, timeline_key, _artifact_version(root, timeline_key))
     if not timeline:
         st.write("No timeline found.")
         return
@@ -113,8 +165,7 @@ def render_host_tab(store, run_id: str, host_id: str):
     st.caption(f"Window {window.get('start')} → {window.get('end')}")
 
     incidents = timeline.get("incidents", [])
-    fleet = _fleet_summary(store, run_id)
-    host_meta = next((h for h in fleet.get("top_hosts", []) if h.get("host_id") == host_id), {})
+    host_meta = _host_meta_index(root, run_id, fleet_version).get(host_id, {})
     if host_meta:
         st.info(
             f"Action: {host_meta.get('action', 'n/a')} | Score: {host_meta.get('score')} "
@@ -122,20 +173,23 @@ def render_host_tab(store, run_id: str, host_id: str):
         )
         if host_meta.get("reasons"):
             st.caption("Score breakdown: " + "; ".join(host_meta["reasons"]))
-    cluster_index = {c.get("signature_hash"): c for c in fleet.get("clusters", [])}
+    cluster_index = _cluster_index(root, run_id, fleet_version)
     if incidents:
         for inc in incidents:
             with st.expander(f"[{inc.get('severity')}] {inc.get('title')} ({inc.get('type')})"):
-                st.write(f"Confidence: {inc.get('confidence')}")
                 signature_hash = inc.get("signature", {}).get("signature_hash")
                 cluster = cluster_index.get(signature_hash)
+                # One markdown element per incident instead of one st.write per line.
+                blocks = [f"Confidence: {inc.get('confidence')}"]
                 if cluster:
-                    st.write(f"Fleet cluster: {cluster.get('signature_key')} ({cluster.get('status')})")
-                st.write(f"Signature: {signature_hash}")
-                st.write("Recommended actions:")
-                for action in inc.get("recommended_actions", []):
-                    st.write(f"- {action}")
-                st.write("Evidence:")
+                    blocks.append(f"Fleet cluster: {cluster.get('signature_key')} ({cluster.get('status')})")
+                blocks.append(f"Signature: {signature_hash}")
+                blocks.append("Recommended actions:")
+                actions = "\n".join(f"- {action}" for action in inc.get("recommended_actions", []))
+                if actions:
+                    blocks.append(actions)
+                blocks.append("Evidence:")
+                st.markdown("\n\n".join(blocks))
                 st.json(inc.get("evidence", [])[:3])
     else:
         st.write("No incidents detected for this host.")
@@ -148,7 +202,8 @@ def render_host_tab(store, run_id: str, host_id: str):
     events = timeline.get("events", [])
     if events:
         st.subheader("Recent events (sample)")
-        st.dataframe(pd.DataFrame(events).head(50))
+        # Slice before building the frame so long event lists are never fully materialized.
+        st.dataframe(pd.DataFrame(events[:50]))
 
 
 def main() -> None:
@@ -156,17 +211,19 @@ def main() -> None:
     st.title("Pre-emptive IT Incident Dashboard")
     st.caption(f"Artifacts root: {artifacts_root()}")
 
+    root = artifacts_root()
     store = artifact_store()
-    runs = _available_runs(store)
+    runs = _available_runs(root)
     if not runs:
         st.warning("No runs found under artifacts/. Generate scenarios and run the worker first.")
         return
     suggested = get_latest_run_id(store) or runs[-1]
     run_id = st.selectbox("Run id", runs, index=runs.index(suggested) if suggested in runs else 0)
-    status = _run_status(store, run_id)
+    status = _run_status(root, run_id)
     if status:
         st.info(f"Run status: {status.get('status')} | started {status.get('started_at')} | finished {status.get('finished_at')} | {status.get('message')}")
-    fleet = _fleet_summary(store, run_id)
+    fleet_version = _artifact_version(root, _fleet_key(run_id))
+    fleet = _fleet_summary(root, run_id, fleet_version)
     if not fleet:
         st.warning(f"No fleet_summary.json found for run {run_id}.")
         return
@@ -176,17 +233,20 @@ def main() -> None:
         render_fleet_tab(fleet)
 
     with tab_host:
-        host_options = _host_options(store, run_id, fleet)
+        host_options = _host_options(
+            root, run_id, fleet_version, _artifact_version(root, f"{run_id}/run_status.json")
+        )
         if not host_options:
             st.write("No hosts available.")
             return
         host_id = st.selectbox("Host", host_options, index=0)
-        render_host_tab(store, run_id, host_id)
+        render_host_tab(root, run_id, host_id, fleet_version)
 
     with tab_validation:
         report_key = f"{run_id}/validation_report.md"
-        if store.exists(report_key):
-            st.markdown(store.read_text(report_key))
+        report = _read_text(root, report_key, _artifact_version(root, report_key))
+        if report is not None:
+            st.markdown(report)
         else:
             st.write("No validation report found.")
 
@@ -1,20 +1,71 @@
-import io
-import json
+import hashlib
 import os
+import re
+import shutil
 import sys
 import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List
+from functools import partial
+from itertools import zip_longest
+from typing import Dict, List, Optional, Tuple
 
 import streamlit as st
 import pandas as pd
 
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEMOS_ROOT = os.path.join(REPO_ROOT, "demos")
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
-
-from runtime.artifact_store import build_artifact_store
-from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
+if DEMOS_ROOT not in sys.path:
+    sys.path.insert(0, DEMOS_ROOT)
+
+from dashboard_shared import (
+    count_file_lines,
+    ensure_dir,
+    file_fingerprint,
+    materialize_input as _materialize_input,
+    save_upload,
+    shadow_status,
+    store_for_root,
+)
+from runtime import json_codec
+from runtime.table_reader import open_excel
+
+try:  # Optional dependency: Arrow CSV reader/writer for Combine Outputs.
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - exercised only when pyarrow is missing
+    pa = None
+    pacsv = None
+
+# Local artifacts are also keyed on (mtime_ns, size), so edits show up immediately; GCS-backed
+# entries rely on the TTL plus invalidate_caches() after this app's own writes.
+CACHE_TTL_SECONDS = 30
+LISTING_TTL_SECONDS = 5
+# Rows read below the header when inferring a canonical schema from a file.
+SCHEMA_SAMPLE_ROWS = 5000
+# Non-blank values per column probed by infer_column_type.
+TYPE_SAMPLE_SIZE = 200
+# Run artifacts puhemies_continue reads; together with the input file they form the resume state key.
+RESUME_STATE_ARTIFACTS = (
+    "evidence_packet.json",
+    "manual_recipe.json",
+    "header_override.json",
+    "human_confirmation.json",
+    "header_spec.json",
+    "adapter_schema_spec.json",
+    "table_region.json",
+)
+# Flow responses kept per process under their resume state key, oldest dropped first.
+RESPONSE_CACHE_ENTRIES = 64
+COMBINE_CHUNK_ROWS = 50_000
+_MISSING = object()
+# Numeric dates (ISO, US or EU order) with an optional time; only these reach pd.to_datetime.
+_DATE_LIKE = re.compile(r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}(?:[T ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+# Rows shown in output and combine previews.
+PREVIEW_ROWS = 200
 
 
 def artifacts_root() -> str:
@@ -23,7 +74,7 @@ def artifacts_root() -> str:
 
 
 def artifact_store():
-    return build_artifact_store(artifacts_root())
+    return store_for_root(artifacts_root())
 
 
 def _path_to_store_key(path: str) -> str:
@@ -35,146 +86,350 @@ def _path_to_store_key(path: str) -> str:
 
 
 def uploads_dir() -> str:
-    path = os.environ.get("UPLOADS_DIR") or os.path.join(os.environ.get("TMPDIR", "/tmp"), "uploads")
-    os.makedirs(path, exist_ok=True)
-    return path
+    return ensure_dir(os.environ.get("UPLOADS_DIR") or os.path.join(os.environ.get("TMPDIR", "/tmp"), "uploads"))
 
 
-def load_json(path: str) -> Dict:
-    store = artifact_store()
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _load_json(root: str, path: str, fingerprint: Optional[tuple]) -> Dict:
+    store = store_for_root(root)
     key = _path_to_store_key(path)
     if store.exists(key):
-        return json.loads(store.read_text(key))
+        return json_codec.loads(store.read_bytes(key))
     if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as handle:
-            return json.load(handle)
+        with open(path, "rb") as handle:
+            return json_codec.loads(handle.read())
     return {}
 
 
+def load_json(path: str) -> Dict:
+    return _load_json(artifacts_root(), path, file_fingerprint(path))
+
+
+@st.cache_data(ttl=LISTING_TTL_SECONDS, show_spinner=False)
+def _list_runs(root: str, root_fingerprint: Optional[tuple]) -> List[str]:
+    return sorted(store_for_root(root).list_runs(), reverse=True)
+
+
 def list_runs() -> List[str]:
-    store = artifact_store()
-    run_ids = set()
-    for key in store.list(""):
-        parts = key.split("/")
-        if parts and parts[0]:
-            run_ids.add(parts[0])
-    return sorted(run_ids, reverse=True)
+    return _list_runs(artifacts_root(), file_fingerprint(artifacts_root()))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _shadow_status(root: str, run_id: str, fingerprint: tuple) -> str:
+    return shadow_status(store_for_root(root), run_id)
 
 
 def load_shadow_status(run_id: str) -> str:
-    store = artifact_store()
-    shadow_key = f"{run_id}/shadow.jsonl"
-    if not store.exists(shadow_key):
-        return "new"
-    last_event = None
-    for line in store.read_text(shadow_key).splitlines():
-        if line.strip():
-            last_event = json.loads(line).get("event")
-    if last_event in ["stop_due_to_ambiguous_headers", "resume_guard_file_changed"]:
-        return "needs_confirmation"
-    if store.exists(f"{run_id}/save_manifest.json"):
-        return "ok"
-    return last_event or "unknown"
-
-
-def get_header_candidates(run_id: str) -> List[Dict]:
-    header_spec = load_json(os.path.join(artifacts_root(), run_id, "header_spec.json"))
-    return header_spec.get("candidates", [])
-
-
-def get_selected_headers(run_id: str) -> List[str]:
-    header_spec = load_json(os.path.join(artifacts_root(), run_id, "header_spec.json"))
-    selected_id = header_spec.get("selected_candidate_id")
-    for cand in header_spec.get("candidates", []):
-        if cand.get("candidate_id") == selected_id:
-            return cand.get("normalized_headers", [])
-    return []
+    run_dir = os.path.join(artifacts_root(), run_id)
+    fingerprint = (
+        file_fingerprint(os.path.join(run_dir, "shadow.jsonl")),
+        file_fingerprint(os.path.join(run_dir, "save_manifest.json")),
+    )
+    return _shadow_status(artifacts_root(), run_id, fingerprint)
+
 
+def invalidate_caches() -> None:
+    for cached in (_load_json, _list_runs, _shadow_status, _find_output_files, _count_rows, _output_preview):
+        cached.clear()
 
-def load_preview_rows(run_id: str) -> List[List[object]]:
-    evidence = load_json(os.path.join(artifacts_root(), run_id, "evidence_packet.json"))
-    return evidence.get("preview_rows", [])
+
+def selected_candidate(header_spec: Dict) -> Optional[Dict]:
+    selected_id = header_spec.get("selected_candidate_id")
+    return next((c for c in header_spec.get("candidates", []) if c.get("candidate_id") == selected_id), None)
 
 
 def write_table_region(run_id: str, payload: Dict) -> None:
     store = artifact_store()
-    store.write_text(
+    store.write_bytes(
         f"{run_id}/table_region.json",
-        json.dumps(payload, indent=2, ensure_ascii=True),
+        json_codec.dumps(payload),
         content_type="application/json",
     )
+    invalidate_caches()
 
 
 def write_adapter_schema(run_id: str, payload: Dict) -> None:
     store = artifact_store()
-    store.write_text(
+    store.write_bytes(
         f"{run_id}/adapter_schema_spec.json",
-        json.dumps(payload, indent=2, ensure_ascii=True),
+        json_codec.dumps(payload),
         content_type="application/json",
     )
+    invalidate_caches()
 
 
 def count_rows(csv_path: str) -> int:
-    store = artifact_store()
+    return _count_rows(artifacts_root(), csv_path, file_fingerprint(csv_path))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _count_rows(root: str, csv_path: str, fingerprint: Optional[tuple]) -> int:
+    # Block-wise newline counting in the store; no per-line decode or str objects.
+    store = store_for_root(root)
     key = _path_to_store_key(csv_path)
     if store.exists(key):
-        text = store.read_text(key)
-        lines = text.splitlines()
-        return max(0, len(lines) - 1)
+        return max(0, store.count_lines(key) - 1)
     if os.path.exists(csv_path):
-        with open(csv_path, "r", encoding="utf-8") as handle:
-            return max(0, sum(1 for _ in handle) - 1)
+        return max(0, count_file_lines(csv_path) - 1)
     return 0
 
 
+def output_preview(csv_path: str) -> pd.DataFrame:
+    return _output_preview(artifacts_root(), csv_path, file_fingerprint(csv_path))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=16, show_spinner=False)
+def _output_preview(root: str, csv_path: str, fingerprint: Optional[tuple]) -> pd.DataFrame:
+    # The C parser stops after PREVIEW_ROWS rows and handles quoted commas.
+    store = store_for_root(root)
+    key = _path_to_store_key(csv_path)
+    try:
+        with store.open_stream(key) as source:
+            return pd.read_csv(source, nrows=PREVIEW_ROWS, dtype=str, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=LISTING_TTL_SECONDS, show_spinner=False)
+def _find_output_files(root: str, runs: tuple) -> List[str]:
+    store = store_for_root(root)
+    return [f"{run_id}/output/clean.csv" for run_id in runs if store.exists(f"{run_id}/output/clean.csv")]
+
+
 def find_output_files() -> List[str]:
-    outputs = []
-    store = artifact_store()
-    for run_id in list_runs():
-        key = f"{run_id}/output/clean.csv"
-        if store.exists(key):
-            outputs.append(key)
-    return outputs
+    return _find_output_files(artifacts_root(), tuple(list_runs()))
+
+
+def combine_outputs(store, output_keys: List[str], handle) -> tuple:
+    """
+    Streams every output CSV into handle in record batches, aligned to the union of their columns
+    plus source_run_id, so only one batch is held in memory at a time. Each file is staged in a
+    temporary file first and appended only once it has been read to the end, so a file that fails
+    part-way is skipped whole. Returns (rows written, preview frame); the preview is None when no
+    output could be read.
+    """
+    columns: Dict[str, None] = {}
+    readable = []
+    for key in output_keys:
+        try:
+            with store.open_stream(key) as source:
+                columns.update(dict.fromkeys(pd.read_csv(source, nrows=0).columns))
+        except Exception:
+            continue
+        readable.append(key)
+    if not readable:
+        return 0, None
+    columns["source_run_id"] = None
+    order = list(columns)
+
+    rows = 0
+    preview_parts = [pd.DataFrame(columns=order)]
+    wrote_header = False
+    for key in readable:
+        with tempfile.TemporaryFile("w+b") as staged:
+            try:
+                file_rows, file_preview = _stage_output(store, key, order, staged, header=not wrote_header)
+            except Exception:
+                continue
+            staged.seek(0)
+            shutil.copyfileobj(staged, handle)
+        wrote_header = True
+        if rows < PREVIEW_ROWS:
+            preview_parts.append(file_preview.head(PREVIEW_ROWS - rows))
+        rows += file_rows
+    if not wrote_header:
+        preview_parts[0].to_csv(handle, index=False)
+    return rows, pd.concat(preview_parts[1:] or preview_parts, ignore_index=True)
+
+
+def _stage_output(store, key: str, order: List[str], staged, header: bool) -> tuple:
+    """
+    Writes one output file, aligned to order, into staged and returns (rows, preview frame). Arrow
+    rejects ragged rows that pandas tolerates, so such files are re-read with pandas.
+    """
+    if pacsv is not None:
+        try:
+            return _stage_output_arrow(store, key, order, staged, header)
+        except pa.ArrowInvalid:
+            staged.seek(0)
+            staged.truncate()
+    return _stage_output_pandas(store, key, order, staged, header)
+
+
+def _stage_output_pandas(store, key: str, order: List[str], staged, header: bool) -> tuple:
+    rows = 0
+    preview_parts = [pd.DataFrame(columns=order)]
+    with store.open_stream(key) as source:
+        for chunk in pd.read_csv(source, dtype=str, chunksize=COMBINE_CHUNK_ROWS):
+            chunk["source_run_id"] = key.split("/")[0]
+            chunk = chunk.reindex(columns=order)
+            chunk.to_csv(staged, header=header and rows == 0, index=False)
+            if rows < PREVIEW_ROWS:
+                preview_parts.append(chunk.head(PREVIEW_ROWS - rows))
+            rows += len(chunk)
+    if header and rows == 0:
+        preview_parts[0].to_csv(staged, index=False)
+    return rows, pd.concat(preview_parts[1:] or preview_parts, ignore_index=True)
+
+
+def _stage_output_arrow(store, key: str, order: List[str], staged, header: bool) -> tuple:
+    # Arrow's multithreaded tokenizer reads every column as string; missing columns become nulls
+    # (written as empty fields) and pandas is only touched for the preview.
+    schema = pa.schema([(name, pa.string()) for name in order])
+    convert_options = pacsv.ConvertOptions(column_types={name: pa.string() for name in order})
+    write_options = pacsv.WriteOptions(include_header=header, quoting_style="needed")
+    run_id = key.split("/")[0]
+    rows = 0
+    preview = []
+    with store.open_stream(key) as source, pacsv.CSVWriter(staged, schema, write_options=write_options) as writer:
+        for batch in pacsv.open_csv(source, convert_options=convert_options):
+            present = set(batch.schema.names)
+            arrays = [
+                batch.column(name) if name in present else pa.nulls(batch.num_rows, pa.string())
+                for name in order[:-1]
+            ]
+            arrays.append(pa.array([run_id] * batch.num_rows, pa.string()))
+            aligned = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            writer.write_batch(aligned)
+            if rows < PREVIEW_ROWS:
+                preview.append(aligned.slice(0, PREVIEW_ROWS - rows))
+            rows += batch.num_rows
+    table = pa.Table.from_batches(preview, schema=schema)
+    return rows, table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
 
 
 def materialize_input(run_id: str, evidence: Dict[str, object]) -> str | None:
-    store = artifact_store()
     cache_dir = os.path.join(tempfile.gettempdir(), "data-agents-mapping", run_id)
-    artifact_key = evidence.get("input_artifact_key")
-    source_uri = evidence.get("source_uri")
-    if artifact_key:
-        store_key = artifact_key.split("artifacts/", 1)[1] if artifact_key.startswith("artifacts/") else artifact_key
-        if store.exists(store_key):
-            os.makedirs(cache_dir, exist_ok=True)
-            local_path = os.path.join(cache_dir, os.path.basename(store_key) or "input")
-            with open(local_path, "wb") as handle:
-                handle.write(store.read_bytes(store_key))
-            return local_path
-    if source_uri and source_uri.startswith("file://"):
-        path = source_uri[len("file://") :]
-        if os.path.exists(path):
-            return path
-    if source_uri and os.path.isabs(source_uri) and os.path.exists(source_uri):
-        return source_uri
-    return None
-
-
-def validation_preview(rows: List[List[object]], field_map: Dict[str, str], required_fields: List[str]) -> Dict[str, float]:
+    return _materialize_input(artifact_store(), evidence, cache_dir)
+
+
+def resume_state_key(run_id: str) -> str:
+    """
+    sha256 over the run id, the resume input artifacts (minus their write timestamps, which change
+    on every click), the (mtime_ns, size) of a local input file and the recipe index version (recipes
+    saved from other runs change what the flow recalls).
+    """
+    from runtime.excel_flow import RECIPE_INDEX_KEY
+
+    run_dir = os.path.join(artifacts_root(), run_id)
+    digest = hashlib.sha256(run_id.encode("utf-8"))
+    for name in RESUME_STATE_ARTIFACTS:
+        payload = load_json(os.path.join(run_dir, name))
+        stable = {key: value for key, value in payload.items() if key != "timestamp"}
+        digest.update(b"\0" + name.encode("utf-8") + b"\0" + json_codec.dumps(stable, indent=False))
+    source_uri = load_json(os.path.join(run_dir, "evidence_packet.json")).get("source_uri") or ""
+    if source_uri.startswith("file://"):
+        digest.update(repr(file_fingerprint(source_uri[len("file://") :])).encode("utf-8"))
+    digest.update(repr(artifact_store().version(RECIPE_INDEX_KEY)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def _response_cache() -> Tuple["OrderedDict[str, Dict]", threading.Lock]:
+    # Shared by all sessions of this process and kept out of the artifact tree.
+    return OrderedDict(), threading.Lock()
+
+
+def save_response(run_id: str, response: Dict) -> None:
+    # Keyed on the post-run state: the flow may rewrite header_spec.json on the way.
+    state_key = resume_state_key(run_id)
+    cache, lock = _response_cache()
+    with lock:
+        cache[state_key] = dict(response)
+        cache.move_to_end(state_key)
+        while len(cache) > RESPONSE_CACHE_ENTRIES:
+            cache.popitem(last=False)
+    invalidate_caches()
+
+
+def cached_response(run_id: str) -> Optional[Dict]:
+    """
+    The last flow response recorded for the run's current state, so a page refresh or a new session
+    shows it without re-running anything. None when the state has changed since.
+    """
+    state_key = resume_state_key(run_id)
+    cache, lock = _response_cache()
+    with lock:
+        cached = cache.get(state_key)
+    return dict(cached) if cached else None
+
+
+def resume_run(run_id: str) -> Dict:
+    """
+    puhemies_continue with its response cached under the run's resume state key, so resuming again
+    with unchanged inputs is a lookup instead of a pipeline run. Only "ok" responses are reused, and
+    only while the run output still exists. A reused response skips the flow's own shadow events and
+    recipe save (the run that produced it already made them), so the reuse itself is logged.
+    """
+    from runtime.excel_flow import puhemies_continue
+
+    cached = cached_response(run_id)
+    store = artifact_store()
+    if cached and cached.get("status") == "ok" and store.exists(f"{run_id}/output/clean.csv"):
+        entry = {
+            "run_id": run_id,
+            "event": "resume_response_reused",
+            "created_at": datetime.utcnow().isoformat() + "Z",
+        }
+        line = json_codec.dumps(entry, indent=False).decode("utf-8")
+        store.append_line(f"{run_id}/shadow.jsonl", line, content_type="application/json")
+        invalidate_caches()
+        return cached
+    response = puhemies_continue(run_id, artifacts_root()).to_dict()
+    save_response(run_id, response)
+    return response
+
+
+def validation_preview(
+    rows: List[List[object]],
+    headers: List[str],
+    field_map: Dict[str, str],
+    required_fields: List[str],
+    types: Optional[Dict[str, str]] = None,
+) -> Dict[str, float]:
+    """
+    Column-wise checks over the data rows. field_map values are source header names, resolved to
+    positions in headers. The numeric/date percentages cover the non-blank values of fields typed
+    "number"/"date" (quantity/order_date when no types are given).
+    """
     stats = {"missing_required_pct": 0.0, "quantity_numeric_pct": 0.0, "date_parse_pct": 0.0}
     if not rows or not field_map:
         return stats
-    header_index = {name: idx for idx, name in enumerate(field_map.values())}
-    missing_required = 0
-    total = len(rows)
-    for row in rows:
-        for field in required_fields:
-            source = field_map.get(field)
-            idx = header_index.get(source, None)
-            value = row[idx] if idx is not None and idx < len(row) else ""
-            if str(value).strip() == "":
-                missing_required += 1
-    if required_fields and total > 0:
-        stats["missing_required_pct"] = round(100 * missing_required / (total * len(required_fields)), 1)
+    df = pd.DataFrame(rows).fillna("").astype(str)
+    header_index = {name: idx for idx, name in enumerate(headers)}
+    width = df.shape[1]
+
+    def column(field: str) -> pd.Series:
+        idx = header_index.get(field_map.get(field), width)
+        if idx >= width:
+            return pd.Series("", index=df.index)
+        return df[idx].str.strip()
+
+    if required_fields:
+        blank = pd.concat([column(field) == "" for field in required_fields], axis=1)
+        stats["missing_required_pct"] = round(100 * float(blank.to_numpy().mean()), 1)
+
+    types = types or {}
+
+    def typed(dtype: str, fallback: str) -> List[str]:
+        fields = [field for field in field_map if types.get(field) == dtype]
+        return fields or [field for field in field_map if field == fallback]
+
+    def parsed_pct(fields: List[str], parse) -> float:
+        if not fields:
+            return 0.0
+        values = pd.concat([column(field) for field in fields], ignore_index=True)
+        values = values[values != ""]
+        if values.empty:
+            return 0.0
+        return round(100 * float(parse(values).notna().mean()), 1)
+
+    stats["quantity_numeric_pct"] = parsed_pct(
+        typed("number", "quantity"), lambda values: pd.to_numeric(values, errors="coerce")
+    )
+    stats["date_parse_pct"] = parsed_pct(
+        typed("date", "order_date"), lambda values: pd.to_datetime(values, errors="coerce", format="mixed")
+    )
     return stats
 
 
@@ -186,59 +441,65 @@ def source_columns_from_preview(headers: List[str], preview_rows: List[List[obje
 
 
 def preview_column_samples(preview_rows: List[List[object]], header_row: int, source_columns: List[str]) -> Dict[str, str]:
-    samples = {}
-    data_rows = preview_rows[header_row + 1 :] if preview_rows else []
-    for idx, name in enumerate(source_columns):
-        values = []
-        for row in data_rows[:3]:
-            if idx < len(row):
-                values.append(str(row[idx]))
-        samples[name] = ", ".join(values)
-    return samples
-
-
-def normalize_header(value: object, idx: int) -> str:
-    if value is None:
-        return f"unnamed_{idx}"
-    text = str(value).strip().lower()
-    if not text:
-        return f"unnamed_{idx}"
-    return text.replace(" ", "_")
+    data_rows = preview_rows[header_row + 1 : header_row + 4] if preview_rows else []
+    # One transpose of the first three data rows; short rows are padded and the padding skipped.
+    columns = list(zip_longest(*data_rows, fillvalue=_MISSING))
+    return {
+        name: ", ".join(str(value) for value in columns[idx] if value is not _MISSING) if idx < len(columns) else ""
+        for idx, name in enumerate(source_columns)
+    }
+
+
+def normalize_headers(values: pd.Series) -> List[str]:
+    # Blank cells become unnamed_<position>; the rest are stripped, lower-cased and underscored.
+    text = values.fillna("").astype(str).str.strip().str.lower().str.replace(" ", "_", regex=False)
+    unnamed = pd.Series([f"unnamed_{idx}" for idx in range(len(text))], index=text.index)
+    return text.where(text != "", unnamed).tolist()
 
 
 def infer_column_type(values: List[object]) -> str:
-    cleaned = [v for v in values if str(v).strip() != ""]
-    if not cleaned:
+    # Vectorized probes over a bounded sample of the non-blank values.
+    text = pd.Series(values, dtype=object).dropna().astype(str).str.strip()
+    text = text[text != ""].head(TYPE_SAMPLE_SIZE)
+    if text.empty:
         return "string"
-    numeric = True
-    date_like = True
-    for value in cleaned:
-        text = str(value).strip()
-        if not text.replace(".", "", 1).isdigit():
-            numeric = False
-        try:
-            pd.to_datetime(value)
-        except Exception:
-            date_like = False
-    if numeric:
+    if text.str.replace(".", "", n=1, regex=False).str.isdigit().all():
         return "number"
-    if date_like:
+    if not text.str.fullmatch(_DATE_LIKE).all():
+        return "string"
+    if pd.to_datetime(text, errors="coerce", format="mixed").notna().all():
         return "date"
     return "string"
 
 
-def load_canonical_schema(path: str, header_row_index: int) -> Dict[str, object]:
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _excel_workbook(path: str, fingerprint: Optional[tuple]) -> tuple:
+    # One open workbook per file version, shared across reruns and sessions; the lock serializes
+    # parses because the underlying reader is not safe for concurrent use.
+    return open_excel(path), threading.Lock()
+
+
+def _read_head(path: str, sheet_name: str | None, nrows: int) -> pd.DataFrame:
+    # Only the rows up to the header plus the rows shown/sampled below it are parsed.
     ext = os.path.splitext(path)[1].lower()
     if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(path, header=None, dtype=object)
-    else:
-        df = pd.read_csv(path, header=None, dtype=object)
+        workbook, lock = _excel_workbook(path, file_fingerprint(path))
+        with lock:
+            return workbook.parse(sheet_name=sheet_name or 0, header=None, dtype=object, nrows=nrows)
+    return pd.read_csv(path, header=None, dtype=object, nrows=nrows)
+
+
+def load_canonical_schema(path: str, header_row_index: int) -> Dict[str, object]:
+    return _load_canonical_schema(path, header_row_index, file_fingerprint(path))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=16, show_spinner=False)
+def _load_canonical_schema(path: str, header_row_index: int, fingerprint: Optional[tuple]) -> Dict[str, object]:
+    df = _read_head(path, None, header_row_index + 1 + SCHEMA_SAMPLE_ROWS)
     if header_row_index < 0 or header_row_index >= len(df):
         return {}
-    raw_headers = df.iloc[header_row_index].fillna("").tolist()
-    normalized_headers = [normalize_header(value, idx) for idx, value in enumerate(raw_headers)]
     data = df.iloc[header_row_index + 1 :].copy()
-    data.columns = normalized_headers
+    data.columns = normalize_headers(df.iloc[header_row_index])
 
     fields = []
     for col in data.columns:
@@ -256,26 +517,37 @@ def load_canonical_schema(path: str, header_row_index: int) -> Dict[str, object]
 def sheet_names_for_file(path: str) -> List[str]:
     if not path or not os.path.exists(path):
         return []
+    return _sheet_names(path, file_fingerprint(path))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=16, show_spinner=False)
+def _sheet_names(path: str, fingerprint: Optional[tuple]) -> List[str]:
     ext = os.path.splitext(path)[1].lower()
     if ext in [".xlsx", ".xls"]:
-        return pd.ExcelFile(path).sheet_names
+        return _excel_workbook(path, fingerprint)[0].sheet_names
     if ext == ".csv":
         return ["csv"]
     return []
 
 
-def header_preview(path: str, sheet_name: str | None, header_row: int, rows_after: int = 10) -> Dict[str, List]:
-    ext = os.path.splitext(path)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(path, sheet_name=sheet_name or 0, header=None, dtype=object)
-    else:
-        df = pd.read_csv(path, header=None, dtype=object)
+def header_preview(path: str, sheet_name: str | None, header_row: int, rows_after: int = 10) -> Dict[str, object]:
+    return _header_preview(path, sheet_name, header_row, rows_after, file_fingerprint(path))
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=16, show_spinner=False)
+def _header_preview(
+    path: str,
+    sheet_name: str | None,
+    header_row: int,
+    rows_after: int,
+    fingerprint: Optional[tuple],
+) -> Dict[str, object]:
+    df = _read_head(path, sheet_name, header_row + 1 + rows_after)
     if header_row < 0 or header_row >= len(df):
         return {"headers": [], "rows": []}
-    raw_headers = df.iloc[header_row].fillna("").tolist()
-    normalized_headers = [normalize_header(value, idx) for idx, value in enumerate(raw_headers)]
-    data_rows = df.iloc[header_row + 1 : header_row + 1 + rows_after].fillna("").values.tolist()
-    return {"headers": normalized_headers, "rows": data_rows}
+    # Rows stay a frame (st.dataframe takes it as-is); stringified so mixed cells serialize to Arrow.
+    data_rows = df.iloc[header_row + 1 : header_row + 1 + rows_after].fillna("").astype(str).reset_index(drop=True)
+    return {"headers": normalize_headers(df.iloc[header_row]), "rows": data_rows}
 
 
 st.set_page_config(page_title="Mapping Studio", page_icon="🧭", layout="wide")
@@ -305,12 +577,14 @@ with tabs[0]:
     uploaded = st.file_uploader("Upload Excel or CSV", type=["xlsx", "xls", "csv"])
     run_id = st.text_input("Run id", value=datetime.utcnow().strftime("%Y%m%d-%H%M%S"))
     if uploaded and st.button("Run"):
-        file_path = os.path.join(uploads_dir(), f"{run_id}_{uploaded.name}")
-        with open(file_path, "wb") as handle:
-            handle.write(uploaded.getbuffer())
-        response = puhemies_run_from_file(run_id, file_path, artifacts_root())
+        from runtime.excel_flow import puhemies_run_from_file
+
+        file_path = save_upload(uploaded, uploads_dir())
+        response = puhemies_run_from_file(run_id, file_path, artifacts_root()).to_dict()
+        invalidate_caches()
+        save_response(run_id, response)
         st.session_state.selected_run = run_id
-        st.session_state.response = response.to_dict()
+        st.session_state.response = response
         st.success("Run started.")
 
 with tabs[1]:
@@ -320,17 +594,23 @@ with tabs[1]:
     else:
         st.subheader(f"Run: {run_id}")
         response = st.session_state.response
+        if not response or response.get("run_id") != run_id:
+            response = st.session_state.response = cached_response(run_id)
         if response:
             st.info(response.get("message", ""))
         evidence = load_json(os.path.join(artifacts_root(), run_id, "evidence_packet.json"))
         header_spec = load_json(os.path.join(artifacts_root(), run_id, "header_spec.json"))
         adapter_spec = load_json(os.path.join(artifacts_root(), run_id, "adapter_schema_spec.json"))
         table_region = load_json(os.path.join(artifacts_root(), run_id, "table_region.json"))
+        # Parsed once per rerun and shared by every detail tab below.
+        preview_rows = evidence.get("preview_rows", [])
+        selected = selected_candidate(header_spec)
+        selected_headers = selected.get("normalized_headers", []) if selected else []
         header_override_key = f"{run_id}/header_override.json"
         if artifact_store().exists(header_override_key):
             st.warning("Manual header override is active for this run.")
             if st.button("Clear Manual Header Override"):
-                artifact_store().write_text(header_override_key, "", content_type="application/json")
+                artifact_store().delete(header_override_key)
                 st.success("Manual header override cleared.")
 
         detail_tabs = st.tabs(
@@ -344,352 +624,359 @@ with tabs[1]:
                 "Validation Preview",
                 "Output",
                 "Combine Outputs",
-            ]
+            ],
+            # Tracked tab state: only the selected tab's body runs (and does IO) on each rerun.
+            key="run_detail_tab",
+            on_change="rerun",
         )
 
         with detail_tabs[0]:
-            st.write("Preview rows (from evidence packet):")
-            preview_rows = evidence.get("preview_rows", [])
-            if preview_rows:
-                st.dataframe(preview_rows, use_container_width=True)
-            st.write(f"Source: {evidence.get('source_uri', 'n/a')}")
+            if detail_tabs[0].open:
+                st.write("Preview rows (from evidence packet):")
+                if preview_rows:
+                    st.dataframe(preview_rows, use_container_width=True)
+                st.write(f"Source: {evidence.get('source_uri', 'n/a')}")
 
         with detail_tabs[1]:
-            st.write("Header candidates:")
-            candidates = header_spec.get("candidates", [])
-            if not candidates:
-                st.warning("No header candidates found yet. Run the flow first.")
-            else:
-                options = {c["candidate_id"]: c for c in candidates}
-                selected = st.radio(
-                    "Choose header candidate",
-                    options=list(options.keys()),
-                    format_func=lambda key: f"{key} | confidence={options[key]['confidence']} | "
-                    f"{', '.join(options[key]['normalized_headers'])}",
-                )
-                if st.button("Apply Header and Resume"):
-                    write_human_confirmation(artifacts_root(), run_id, selected, confirmed_by="mapping_studio")
-                    response_after = puhemies_continue(run_id, artifacts_root())
-                    st.session_state.response = response_after.to_dict()
-                    st.success("Header confirmation saved. Resumed.")
-                st.caption("If no candidate fits, use the Manual Header tab to override the header row.")
+            if detail_tabs[1].open:
+                st.write("Header candidates:")
+                candidates = header_spec.get("candidates", [])
+                if not candidates:
+                    st.warning("No header candidates found yet. Run the flow first.")
+                else:
+                    options = {c["candidate_id"]: c for c in candidates}
+                    choice = st.radio(
+                        "Choose header candidate",
+                        options=list(options.keys()),
+                        format_func=lambda key: f"{key} | confidence={options[key]['confidence']} | "
+                        f"{', '.join(options[key]['normalized_headers'])}",
+                    )
+                    if st.button("Apply Header and Resume"):
+                        from runtime.excel_flow import write_human_confirmation
+
+                        write_human_confirmation(artifacts_root(), run_id, choice, confirmed_by="mapping_studio")
+                        invalidate_caches()
+                        st.session_state.response = resume_run(run_id)
+                        st.success("Header confirmation saved. Resumed.")
+                    st.caption("If no candidate fits, use the Manual Header tab to override the header row.")
 
         with detail_tabs[2]:
-            st.write("Manual header selection (override).")
-            file_path = materialize_input(run_id, evidence)
-            if not file_path:
-                st.warning("No readable input found. Run the flow from a file to use manual override.")
-            else:
-                preview_rows = load_preview_rows(run_id)
-                if "manual_header_row" not in st.session_state:
-                    st.session_state.manual_header_row = 0
-                available_sheets = sheet_names_for_file(file_path)
-                header_row_index = 0
-                if not available_sheets:
-                    st.warning("No sheets found for this file.")
-                    preview = {"headers": [], "rows": []}
-                    sheet = None
+            if detail_tabs[2].open:
+                st.write("Manual header selection (override).")
+                file_path = materialize_input(run_id, evidence)
+                if not file_path:
+                    st.warning("No readable input found. Run the flow from a file to use manual override.")
                 else:
-                    sheet = st.selectbox("Sheet", options=available_sheets, index=0)
-                    if preview_rows:
-                        row_options = []
-                        for idx, row in enumerate(preview_rows):
-                            row_preview = ", ".join(str(value) for value in row[:4])
-                            row_options.append(f"{idx}: {row_preview}")
-                        selected_row = st.selectbox(
-                            "Use preview row as header",
-                            options=row_options,
-                            index=min(st.session_state.manual_header_row, len(row_options) - 1),
+                    if "manual_header_row" not in st.session_state:
+                        st.session_state.manual_header_row = 0
+                    available_sheets = sheet_names_for_file(file_path)
+                    header_row_index = 0
+                    if not available_sheets:
+                        st.warning("No sheets found for this file.")
+                        preview = {"headers": [], "rows": []}
+                        sheet = None
+                    else:
+                        sheet = st.selectbox("Sheet", options=available_sheets, index=0)
+                        if preview_rows:
+                            row_options = []
+                            for idx, row in enumerate(preview_rows):
+                                row_preview = ", ".join(str(value) for value in row[:4])
+                                row_options.append(f"{idx}: {row_preview}")
+                            selected_row = st.selectbox(
+                                "Use preview row as header",
+                                options=row_options,
+                                index=min(st.session_state.manual_header_row, len(row_options) - 1),
+                            )
+                            st.session_state.manual_header_row = int(selected_row.split(":")[0])
+                        header_row_index = st.number_input(
+                            "Header row index (0-based)",
+                            min_value=0,
+                            value=int(st.session_state.manual_header_row),
                         )
-                        st.session_state.manual_header_row = int(selected_row.split(":")[0])
-                    header_row_index = st.number_input(
-                        "Header row index (0-based)",
-                        min_value=0,
-                        value=int(st.session_state.manual_header_row),
-                    )
-                    preview = header_preview(file_path, sheet, int(header_row_index))
-                if preview["headers"]:
-                    st.write("Header preview:")
-                    st.dataframe([preview["headers"]], use_container_width=True)
-                    st.write("Rows preview:")
-                    st.dataframe(preview["rows"], use_container_width=True)
-
-                    rename_rows = [
-                        {"original_header": header, "edited_header": header} for header in preview["headers"]
-                    ]
-                    rename_df = st.data_editor(rename_rows, use_container_width=True, hide_index=True)
-                    edited_headers = {}
-                    for row in rename_df:
-                        original = row.get("original_header", "")
-                        edited = row.get("edited_header", "")
-                        if original and edited and edited != original:
-                            edited_headers[original] = edited
-                else:
-                    edited_headers = {}
-                    st.write("No headers found for that row.")
-
-                if st.button("Apply Manual Header and Resume"):
-                    override_payload = {
-                        "run_id": run_id,
-                        "mode": "manual",
-                        "sheet_name": sheet,
-                        "header_row_index": int(header_row_index),
-                        "header_rows": [int(header_row_index)],
-                        "merge_strategy": "single",
-                        "edited_headers": edited_headers,
-                        "confirmed_by": "streamlit",
-                        "timestamp": datetime.utcnow().isoformat() + "Z",
-                        "notes": "manual override from mapping studio",
-                    }
-                    path = os.path.join(artifacts_root(), run_id, "header_override.json")
-                    with open(path, "w", encoding="utf-8") as handle:
-                        json.dump(override_payload, handle, indent=2, ensure_ascii=True)
-                    response_after = puhemies_continue(run_id, artifacts_root())
-                    st.session_state.response = response_after.to_dict()
-                    st.success("Header override saved. Resumed.")
+                        preview = header_preview(file_path, sheet, int(header_row_index))
+                    if preview["headers"]:
+                        st.write("Header preview:")
+                        st.dataframe([preview["headers"]], use_container_width=True)
+                        st.write("Rows preview:")
+                        st.dataframe(preview["rows"], use_container_width=True)
+
+                        rename_rows = [
+                            {"original_header": header, "edited_header": header} for header in preview["headers"]
+                        ]
+                        rename_df = st.data_editor(rename_rows, use_container_width=True, hide_index=True)
+                        edited_headers = {}
+                        for row in rename_df:
+                            original = row.get("original_header", "")
+                            edited = row.get("edited_header", "")
+                            if original and edited and edited != original:
+                                edited_headers[original] = edited
+                    else:
+                        edited_headers = {}
+                        st.write("No headers found for that row.")
+
+                    if st.button("Apply Manual Header and Resume"):
+                        override_payload = {
+                            "run_id": run_id,
+                            "mode": "manual",
+                            "sheet_name": sheet,
+                            "header_row_index": int(header_row_index),
+                            "header_rows": [int(header_row_index)],
+                            "merge_strategy": "single",
+                            "edited_headers": edited_headers,
+                            "confirmed_by": "streamlit",
+                            "timestamp": datetime.utcnow().isoformat() + "Z",
+                            "notes": "manual override from mapping studio",
+                        }
+                        artifact_store().write_bytes(
+                            f"{run_id}/header_override.json",
+                            json_codec.dumps(override_payload),
+                            content_type="application/json",
+                        )
+                        invalidate_caches()
+                        st.session_state.response = resume_run(run_id)
+                        st.success("Header override saved. Resumed.")
 
         with detail_tabs[3]:
-            st.write("Define an ordered header list and map columns explicitly.")
-            preview_rows = load_preview_rows(run_id)
-            selected_headers = get_selected_headers(run_id)
-            source_columns = source_columns_from_preview(selected_headers, preview_rows)
-            header_row_index = 0
-            selected_id = header_spec.get("selected_candidate_id")
-            selected = next(
-                (c for c in header_spec.get("candidates", []) if c.get("candidate_id") == selected_id), None
-            )
-            if selected:
-                header_row_index = selected.get("header_rows", [0])[0]
-
-            initial_headers = adapter_spec.get("canonical_fields") or selected_headers or ["field_1", "field_2"]
-            rows = [{"order": idx + 1, "canonical_header": name} for idx, name in enumerate(initial_headers)]
-            edited_rows = st.data_editor(rows, use_container_width=True, num_rows="dynamic")
-            ordered = sorted(
-                [row for row in edited_rows if row.get("canonical_header")],
-                key=lambda row: int(row.get("order", 0)),
-            )
-            canonical_fields = [row["canonical_header"] for row in ordered]
-
-            samples = preview_column_samples(preview_rows, header_row_index, source_columns)
-            field_map = {}
-            required_fields = []
-            types = {}
-            for idx, field in enumerate(canonical_fields):
-                col = st.selectbox(
-                    f"Map {field} to source column",
-                    options=[""] + source_columns,
-                    index=0,
-                    key=f"header_list_map_{idx}",
-                )
-                if col:
-                    field_map[field] = col
-                    st.caption(f"Sample: {samples.get(col, '')}")
-                types[field] = st.selectbox(
-                    f"{field} type",
-                    options=["string", "number", "date"],
-                    index=0,
-                    key=f"header_list_type_{idx}",
+            if detail_tabs[3].open:
+                st.write("Define an ordered header list and map columns explicitly.")
+                source_columns = source_columns_from_preview(selected_headers, preview_rows)
+                header_row_index = 0
+                if selected:
+                    header_row_index = selected.get("header_rows", [0])[0]
+
+                initial_headers = adapter_spec.get("canonical_fields") or selected_headers or ["field_1", "field_2"]
+                rows = [{"order": idx + 1, "canonical_header": name} for idx, name in enumerate(initial_headers)]
+                edited_rows = st.data_editor(rows, use_container_width=True, num_rows="dynamic")
+                ordered = sorted(
+                    [row for row in edited_rows if row.get("canonical_header")],
+                    key=lambda row: int(row.get("order", 0)),
                 )
-                if st.checkbox(f"{field} required", value=False, key=f"header_list_req_{idx}"):
-                    required_fields.append(field)
-
-            if st.button("Save Header List Mapping"):
-                payload = {
-                    "run_id": run_id,
-                    "schema_layer": "adapter",
-                    "canonical_fields": canonical_fields,
-                    "field_map": field_map,
-                    "types": types,
-                    "required_fields": required_fields,
-                    "evidence_keys": [
-                        f"artifacts/{run_id}/header_spec.json",
-                        f"artifacts/{run_id}/evidence_packet.json",
-                    ],
-                }
-                write_adapter_schema(run_id, payload)
-                st.success("Adapter schema saved.")
-
-            if st.button("Resume with Header List Mapping"):
-                response_after = puhemies_continue(run_id, artifacts_root())
-                st.session_state.response = response_after.to_dict()
-                st.success("Resumed with header list mapping.")
-
-        with detail_tabs[4]:
-            st.write("Define table region (optional).")
-            sheet_name = st.text_input("Sheet name", value=table_region.get("sheet_name", ""))
-            start_row = st.number_input("Start row (0-based)", min_value=0, value=table_region.get("start_row", 0))
-            end_row = st.number_input("End row (0-based)", min_value=0, value=table_region.get("end_row", 0))
-            include_columns = st.text_input(
-                "Include columns (comma-separated)", value=", ".join(table_region.get("include_columns", []))
-            )
-            exclude_columns = st.text_input(
-                "Exclude columns (comma-separated)", value=", ".join(table_region.get("exclude_columns", []))
-            )
-            if st.button("Save Table Region"):
-                payload = {
-                    "sheet_name": sheet_name or None,
-                    "start_row": int(start_row),
-                    "end_row": int(end_row),
-                    "include_columns": [c.strip() for c in include_columns.split(",") if c.strip()],
-                    "exclude_columns": [c.strip() for c in exclude_columns.split(",") if c.strip()],
-                }
-                write_table_region(run_id, payload)
-                st.success("Table region saved.")
-
-        with detail_tabs[5]:
-            st.write("Map detected columns to canonical fields.")
-            headers = get_selected_headers(run_id)
-            if not headers:
-                st.warning("Pick a header candidate first.")
-            else:
-                schema_path = st.text_input("Canonical schema path (optional)")
-                schema_header_row = st.number_input("Schema header row (0-based)", min_value=0, value=0)
-                if st.button("Load Canonical Schema"):
-                    if not schema_path or not os.path.exists(schema_path):
-                        st.warning("Provide a valid schema path.")
-                    else:
-                        schema_payload = load_canonical_schema(schema_path, int(schema_header_row))
-                        if schema_payload.get("fields"):
-                            canonical_schema = {
-                                "run_id": run_id,
-                                "schema_layer": "core",
-                                "fields": schema_payload["fields"],
-                                "source_path": os.path.relpath(schema_path, REPO_ROOT),
-                            }
-                            path = os.path.join(artifacts_root(), run_id, "canonical_schema.json")
-                            with open(path, "w", encoding="utf-8") as handle:
-                                json.dump(canonical_schema, handle, indent=2, ensure_ascii=True)
-                            st.success("Canonical schema loaded.")
-                        else:
-                            st.warning("No headers found at that row.")
-
-                canonical_schema = load_json(os.path.join(artifacts_root(), run_id, "canonical_schema.json"))
-                canonical_fields_from_schema = [
-                    field.get("canonical")
-                    for field in canonical_schema.get("fields", [])
-                    if field.get("canonical")
-                ]
-                types_from_schema = {
-                    field.get("canonical"): field.get("dtype")
-                    for field in canonical_schema.get("fields", [])
-                    if field.get("canonical")
-                }
-                required_from_schema = [
-                    field.get("canonical")
-                    for field in canonical_schema.get("fields", [])
-                    if field.get("required")
-                ]
-
-                canonical_fields = adapter_spec.get("canonical_fields", ["product_code", "quantity", "order_date"])
-                if canonical_fields_from_schema:
-                    canonical_fields = canonical_fields_from_schema
-                types = adapter_spec.get("types", {})
-                if types_from_schema:
-                    types.update(types_from_schema)
-                required_fields = adapter_spec.get("required_fields", [])
-                if required_from_schema:
-                    required_fields = required_from_schema
-                field_map = adapter_spec.get("field_map", {})
-                evidence_keys = [
-                    f"artifacts/{run_id}/header_spec.json",
-                    f"artifacts/{run_id}/evidence_packet.json",
-                ]
-
-                updated_fields = []
-                updated_map = {}
-                updated_types = {}
-                updated_required = []
-                for field in canonical_fields:
-                    col = st.selectbox(f"{field}", options=[""] + headers, index=0)
-                    updated_fields.append(field)
+                canonical_fields = [row["canonical_header"] for row in ordered]
+
+                samples = preview_column_samples(preview_rows, header_row_index, source_columns)
+                field_map = {}
+                required_fields = []
+                types = {}
+                for idx, field in enumerate(canonical_fields):
+                    col = st.selectbox(
+                        f"Map {field} to source column",
+                        options=[""] + source_columns,
+                        index=0,
+                        key=f"header_list_map_{idx}",
+                    )
                     if col:
-                        updated_map[field] = col
-                    dtype = st.selectbox(f"{field} type", options=["string", "number", "date"], index=0)
-                    updated_types[field] = dtype
-                    if st.checkbox(f"{field} required", value=field in required_fields):
-                        updated_required.append(field)
+                        field_map[field] = col
+                        st.caption(f"Sample: {samples.get(col, '')}")
+                    types[field] = st.selectbox(
+                        f"{field} type",
+                        options=["string", "number", "date"],
+                        index=0,
+                        key=f"header_list_type_{idx}",
+                    )
+                    if st.checkbox(f"{field} required", value=False, key=f"header_list_req_{idx}"):
+                        required_fields.append(field)
 
-                if st.button("Save Adapter Schema"):
+                if st.button("Save Header List Mapping"):
                     payload = {
                         "run_id": run_id,
                         "schema_layer": "adapter",
-                        "canonical_fields": updated_fields,
-                        "field_map": updated_map,
-                        "types": updated_types,
-                        "required_fields": updated_required,
-                        "evidence_keys": evidence_keys,
+                        "canonical_fields": canonical_fields,
+                        "field_map": field_map,
+                        "types": types,
+                        "required_fields": required_fields,
+                        "evidence_keys": [
+                            f"artifacts/{run_id}/header_spec.json",
+                            f"artifacts/{run_id}/evidence_packet.json",
+                        ],
                     }
                     write_adapter_schema(run_id, payload)
                     st.success("Adapter schema saved.")
 
-                if st.button("Resume with Adapter"):
-                    response_after = puhemies_continue(run_id, artifacts_root())
-                    st.session_state.response = response_after.to_dict()
-                    st.success("Resumed with adapter schema.")
+                if st.button("Resume with Header List Mapping"):
+                    st.session_state.response = resume_run(run_id)
+                    st.success("Resumed with header list mapping.")
+
+        with detail_tabs[4]:
+            if detail_tabs[4].open:
+                st.write("Define table region (optional).")
+                sheet_name = st.text_input("Sheet name", value=table_region.get("sheet_name", ""))
+                start_row = st.number_input("Start row (0-based)", min_value=0, value=table_region.get("start_row", 0))
+                end_row = st.number_input("End row (0-based)", min_value=0, value=table_region.get("end_row", 0))
+                include_columns = st.text_input(
+                    "Include columns (comma-separated)", value=", ".join(table_region.get("include_columns", []))
+                )
+                exclude_columns = st.text_input(
+                    "Exclude columns (comma-separated)", value=", ".join(table_region.get("exclude_columns", []))
+                )
+                if st.button("Save Table Region"):
+                    payload = {
+                        "sheet_name": sheet_name or None,
+                        "start_row": int(start_row),
+                        "end_row": int(end_row),
+                        "include_columns": [c.strip() for c in include_columns.split(",") if c.strip()],
+                        "exclude_columns": [c.strip() for c in exclude_columns.split(",") if c.strip()],
+                    }
+                    write_table_region(run_id, payload)
+                    st.success("Table region saved.")
+
+        with detail_tabs[5]:
+            if detail_tabs[5].open:
+                st.write("Map detected columns to canonical fields.")
+                headers = selected_headers
+                if not headers:
+                    st.warning("Pick a header candidate first.")
+                else:
+                    schema_path = st.text_input("Canonical schema path (optional)")
+                    schema_header_row = st.number_input("Schema header row (0-based)", min_value=0, value=0)
+                    if st.button("Load Canonical Schema"):
+                        if not schema_path or not os.path.exists(schema_path):
+                            st.warning("Provide a valid schema path.")
+                        else:
+                            schema_payload = load_canonical_schema(schema_path, int(schema_header_row))
+                            if schema_payload.get("fields"):
+                                canonical_schema = {
+                                    "run_id": run_id,
+                                    "schema_layer": "core",
+                                    "fields": schema_payload["fields"],
+                                    "source_path": os.path.relpath(schema_path, REPO_ROOT),
+                                }
+                                artifact_store().write_bytes(
+                                    f"{run_id}/canonical_schema.json",
+                                    json_codec.dumps(canonical_schema),
+                                    content_type="application/json",
+                                )
+                                invalidate_caches()
+                                st.success("Canonical schema loaded.")
+                            else:
+                                st.warning("No headers found at that row.")
+
+                    canonical_schema = load_json(os.path.join(artifacts_root(), run_id, "canonical_schema.json"))
+                    canonical_fields_from_schema = [
+                        field.get("canonical")
+                        for field in canonical_schema.get("fields", [])
+                        if field.get("canonical")
+                    ]
+                    types_from_schema = {
+                        field.get("canonical"): field.get("dtype")
+                        for field in canonical_schema.get("fields", [])
+                        if field.get("canonical")
+                    }
+                    required_from_schema = [
+                        field.get("canonical")
+                        for field in canonical_schema.get("fields", [])
+                        if field.get("required")
+                    ]
+
+                    canonical_fields = adapter_spec.get("canonical_fields", ["product_code", "quantity", "order_date"])
+                    if canonical_fields_from_schema:
+                        canonical_fields = canonical_fields_from_schema
+                    types = adapter_spec.get("types", {})
+                    if types_from_schema:
+                        types.update(types_from_schema)
+                    required_fields = adapter_spec.get("required_fields", [])
+                    if required_from_schema:
+                        required_fields = required_from_schema
+                    field_map = adapter_spec.get("field_map", {})
+                    evidence_keys = [
+                        f"artifacts/{run_id}/header_spec.json",
+                        f"artifacts/{run_id}/evidence_packet.json",
+                    ]
+
+                    updated_fields = []
+                    updated_map = {}
+                    updated_types = {}
+                    updated_required = []
+                    for field in canonical_fields:
+                        col = st.selectbox(f"{field}", options=[""] + headers, index=0)
+                        updated_fields.append(field)
+                        if col:
+                            updated_map[field] = col
+                        dtype = st.selectbox(f"{field} type", options=["string", "number", "date"], index=0)
+                        updated_types[field] = dtype
+                        if st.checkbox(f"{field} required", value=field in required_fields):
+                            updated_required.append(field)
+
+                    if st.button("Save Adapter Schema"):
+                        payload = {
+                            "run_id": run_id,
+                            "schema_layer": "adapter",
+                            "canonical_fields": updated_fields,
+                            "field_map": updated_map,
+                            "types": updated_types,
+                            "required_fields": updated_required,
+                            "evidence_keys": evidence_keys,
+                        }
+                        write_adapter_schema(run_id, payload)
+                        st.success("Adapter schema saved.")
+
+                    if st.button("Resume with Adapter"):
+                        st.session_state.response = resume_run(run_id)
+                        st.success("Resumed with adapter schema.")
 
         with detail_tabs[6]:
-            st.write("Validation preview (lightweight).")
-            preview_rows = load_preview_rows(run_id)
-            header_spec = load_json(os.path.join(artifacts_root(), run_id, "header_spec.json"))
-            selected_id = header_spec.get("selected_candidate_id")
-            selected = next(
-                (c for c in header_spec.get("candidates", []) if c.get("candidate_id") == selected_id), None
-            )
-            if selected:
-                header_row = selected.get("header_rows", [0])[0]
-                data_rows = preview_rows[header_row + 1 :]
-                field_map = adapter_spec.get("field_map", {})
-                required_fields = adapter_spec.get("required_fields", [])
-                stats = validation_preview(data_rows, field_map, required_fields)
-                st.metric("Missing required (%)", stats["missing_required_pct"])
-            else:
-                st.write("No header selected.")
+            if detail_tabs[6].open:
+                st.write("Validation preview (lightweight).")
+                if selected:
+                    header_row = selected.get("header_rows", [0])[0]
+                    data_rows = preview_rows[header_row + 1 :]
+                    stats = validation_preview(
+                        data_rows,
+                        selected_headers,
+                        adapter_spec.get("field_map", {}),
+                        adapter_spec.get("required_fields", []),
+                        adapter_spec.get("types", {}),
+                    )
+                    metric_cols = st.columns(3)
+                    metric_cols[0].metric("Missing required (%)", stats["missing_required_pct"])
+                    metric_cols[1].metric("Numeric values (%)", stats["quantity_numeric_pct"])
+                    metric_cols[2].metric("Parseable dates (%)", stats["date_parse_pct"])
+                else:
+                    st.write("No header selected.")
 
         with detail_tabs[7]:
-            store = artifact_store()
-            output_key = f"{run_id}/output/clean.csv"
-            if store.exists(output_key):
-                text = store.read_text(output_key)
-                st.success("Output ready.")
-                st.write(f"Output: {store.uri_for_key(output_key)}")
-                st.write(f"Rows written: {max(0, len(text.splitlines()) - 1)}")
-                st.download_button("Download CSV", store.read_bytes(output_key), file_name="clean.csv")
-                st.write("Preview:")
-                preview = [line.split(",") for line in text.splitlines()[:200]]
-                st.dataframe(preview, use_container_width=True)
-            else:
-                st.write("No output yet. Resume the run to generate output.")
+            if detail_tabs[7].open:
+                store = artifact_store()
+                output_key = f"{run_id}/output/clean.csv"
+                if store.exists(output_key):
+                    output_path = os.path.join(artifacts_root(), output_key)
+                    st.success("Output ready.")
+                    st.write(f"Output: {store.uri_for_key(output_key)}")
+                    st.write(f"Rows written: {count_rows(output_path)}")
+                    # Deferred: the CSV is read from the store only when the button is clicked.
+                    st.download_button(
+                        "Download CSV", partial(store.read_bytes, output_key), file_name="clean.csv", mime="text/csv"
+                    )
+                    st.write("Preview:")
+                    st.dataframe(output_preview(output_path), use_container_width=True)
+                else:
+                    st.write("No output yet. Resume the run to generate output.")
 
         with detail_tabs[8]:
-            st.write("Combine outputs from all runs under artifacts/.")
-            output_files = find_output_files()
-            if not output_files:
-                st.write("No output files found.")
-            else:
-                st.write(f"Found {len(output_files)} output files.")
-                if st.button("Combine All Outputs", key="combine_outputs"):
-                    frames = []
-                    store = artifact_store()
-                    for key in output_files:
-                        try:
-                            df = pd.read_csv(io.BytesIO(store.read_bytes(key)))
-                            df["source_run_id"] = key.split("/")[0]
-                            frames.append(df)
-                        except Exception:
-                            continue
-                    if frames:
-                        combined = pd.concat(frames, ignore_index=True)
-                        combined_payload = combined.to_csv(index=False).encode("utf-8")
+            if detail_tabs[8].open:
+                st.write("Combine outputs from all runs under artifacts/.")
+                output_files = find_output_files()
+                if not output_files:
+                    st.write("No output files found.")
+                else:
+                    st.write(f"Found {len(output_files)} output files.")
+                    if st.button("Combine All Outputs", key="combine_outputs"):
+                        store = artifact_store()
                         combined_key = "combined/combined.csv"
-                        store.write_bytes(combined_key, combined_payload, content_type="text/csv")
-                        st.success("Combined output saved.")
-                        st.write(f"Output: {store.uri_for_key(combined_key)}")
-                        st.write(f"Rows written: {len(combined)}")
-                        st.dataframe(combined.head(200), use_container_width=True)
-                        st.download_button(
-                            "Download Combined CSV",
-                            combined_payload,
-                            file_name="combined.csv",
-                        )
-                    else:
-                        st.warning("No readable outputs to combine.")
+                        with tempfile.TemporaryFile("w+b") as handle:
+                            rows_written, combined_preview = combine_outputs(store, output_files, handle)
+                            if combined_preview is not None:
+                                handle.seek(0)
+                                store.write_stream(combined_key, handle, content_type="text/csv")
+                        if combined_preview is not None:
+                            st.success("Combined output saved.")
+                            st.write(f"Output: {store.uri_for_key(combined_key)}")
+                            st.write(f"Rows written: {rows_written}")
+                            st.dataframe(combined_preview, use_container_width=True)
+                            st.download_button(
+                                "Download Combined CSV",
+                                partial(store.read_bytes, combined_key),
+                                file_name="combined.csv",
+                                mime="text/csv",
+                            )
+                        else:
+                            st.warning("No readable outputs to combine.")
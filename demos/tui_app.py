@@ -7,7 +7,7 @@ REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
-from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
+from runtime.artifact_store import count_stream_lines
 
 
 def _repo_root() -> str:
@@ -27,11 +27,14 @@ def _print_choices(choices):
 def _count_rows(csv_path: str) -> int:
     if not os.path.exists(csv_path):
         return 0
-    with open(csv_path, "r", encoding="utf-8") as handle:
-        return max(0, sum(1 for _ in handle) - 1)
+    with open(csv_path, "rb") as handle:
+        return max(0, count_stream_lines(handle) - 1)
 
 
 def run_tui(input_path: str, run_id: str, interactive: bool) -> int:
+    # Imported here so --help and the input prompt appear before pandas has loaded.
+    from runtime.excel_flow import puhemies_continue, puhemies_run_from_file, write_human_confirmation
+
     response = puhemies_run_from_file(run_id, input_path, _artifacts_root())
     response_dict = response.to_dict()
     print(response_dict["message"])
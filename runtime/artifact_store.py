@@ -1,7 +1,42 @@
+import io
 import os
-import json
 import shutil
-from typing import List, Optional
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, List, Optional, Set, Tuple
+
+from runtime import json_codec
+
+
+# Connections kept open to storage.googleapis.com by stores that build their own client.
+GCS_HTTP_POOL_SIZE = 64
+# Concurrent uploads in GCSArtifactStore.write_many; each PUT is latency-bound, not bandwidth-bound.
+GCS_UPLOAD_WORKERS = 16
+# Deletes sent per GCS batch request (the JSON API accepts up to 1000; 100 is the recommended size).
+GCS_DELETE_BATCH_SIZE = 100
+# Compose attempts in GCSArtifactStore.append_line before giving up on a contended object.
+GCS_APPEND_ATTEMPTS = 8
+# Name prefix of the temp files LocalArtifactStore writes next to their target; list() skips them.
+_TEMP_PREFIX = ".tmp-"
+
+
+def _temp_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f"{_TEMP_PREFIX}{uuid.uuid4().hex}-{name}")
+
+
+def count_stream_lines(handle: BinaryIO, chunk_size: int = 1 << 20) -> int:
+    """
+    Counts lines by streaming raw bytes in chunks; a final line without a trailing newline counts.
+    """
+    count = 0
+    last = b""
+    while chunk := handle.read(chunk_size):
+        count += chunk.count(b"\n")
+        last = chunk[-1:]
+    return count + (1 if last and last != b"\n" else 0)
 
 
 class ArtifactStore:
@@ -22,15 +57,106 @@ class ArtifactStore:
     def write_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
         raise NotImplementedError
 
+    def write_stream(self, key: str, source: BinaryIO, content_type: Optional[str] = None) -> None:
+        """
+        Writes the remaining bytes of a readable binary file object. Backends override this to copy
+        in bounded chunks instead of holding the whole payload in memory.
+        """
+        self.write_bytes(key, source.read(), content_type=content_type)
+
+    def read_tail(self, key: str, nbytes: int) -> bytes:
+        """
+        Returns at most the last nbytes of the object. Backends override this with a ranged read.
+        """
+        return self.read_bytes(key)[-nbytes:]
+
+    def append_line(self, key: str, line: str, content_type: Optional[str] = None) -> None:
+        """
+        Appends one line (newline added) to a line-oriented artifact, creating it if needed and
+        starting on a fresh line if the existing content lacks a trailing newline. This fallback
+        rewrites the object; backends override it with a real append.
+        """
+        existing = self.read_bytes(key) if self.exists(key) else b""
+        if existing and not existing.endswith(b"\n"):
+            existing += b"\n"
+        self.write_bytes(key, existing + f"{line}\n".encode("utf-8"), content_type=content_type)
+
+    def read_last_line(self, key: str, window: int = 4096) -> bytes:
+        """
+        Returns the last non-empty line of a line-oriented artifact (e.g. shadow.jsonl) without
+        reading the whole object; the tail window grows until it spans a full line.
+        """
+        while True:
+            tail = self.read_tail(key, window)
+            body = tail.rstrip()
+            if b"\n" in body or len(tail) < window:
+                return body.rsplit(b"\n", 1)[-1].strip()
+            window *= 4
+
+    def open_stream(self, key: str) -> BinaryIO:
+        """
+        Returns a binary file-like object for sequential reads. Callers close it.
+        """
+        return io.BytesIO(self.read_bytes(key))
+
+    def size(self, key: str) -> int:
+        """
+        Returns the object size in bytes. Backends override this with a metadata lookup.
+        """
+        return len(self.read_bytes(key))
+
+    def count_lines(self, key: str, chunk_size: int = 1 << 20) -> int:
+        """
+        Line count of the object, streamed through count_stream_lines.
+        """
+        with self.open_stream(key) as handle:
+            return count_stream_lines(handle, chunk_size)
+
     def exists(self, key: str) -> bool:
         raise NotImplementedError
 
     def list(self, prefix: str = "") -> List[str]:
         raise NotImplementedError
 
+    def write_many(self, items: Iterable[Tuple[str, bytes, Optional[str]]]) -> None:
+        """
+        Writes (key, data, content_type) items that do not depend on each other's order. Backends with
+        per-request latency override this to upload concurrently.
+        """
+        for key, data, content_type in items:
+            self.write_bytes(key, data, content_type=content_type)
+
+    def version(self, key: str) -> Optional[object]:
+        """
+        Returns a token that changes whenever the object is rewritten, or None when it does not exist.
+        The fallback token never compares equal, so callers caching on it simply always miss.
+        """
+        return object() if self.exists(key) else None
+
+    def exists_many(self, keys: Iterable[str]) -> Set[str]:
+        """
+        Returns the subset of keys that exist. Backends with per-call latency override this with a
+        single listing instead of one exists() round-trip per key.
+        """
+        return {key for key in keys if self.exists(key)}
+
     def list_prefix(self, prefix: str = "") -> List[str]:
         return self.list(prefix)
 
+    def list_top_level(self, prefix: str = "") -> List[str]:
+        """
+        Returns the sorted names of the pseudo-directories directly under prefix, e.g. the host ids
+        under "run_a/hosts". Backends override this with a non-recursive listing.
+        """
+        base = prefix.strip("/")
+        base = f"{base}/" if base else ""
+        names = set()
+        for key in self.list(base):
+            child, sep, _ = key[len(base) :].partition("/")
+            if sep and child:
+                names.add(child)
+        return sorted(names)
+
     def uri_for_key(self, key: str) -> str:
         """
         Returns a fully qualified URI for the key when available (gs://... for GCS, file:// for local).
@@ -38,14 +164,23 @@ class ArtifactStore:
         raise NotImplementedError
 
     def read_json(self, key: str) -> dict:
-        return json.loads(self.read_text(key))
+        return json_codec.loads(self.read_bytes(key))
 
-    def write_json(self, key: str, payload: dict, content_type: Optional[str] = "application/json") -> None:
-        self.write_text(key, json.dumps(payload, indent=2, ensure_ascii=True), content_type=content_type)
+    def write_json(
+        self, key: str, payload: dict, content_type: Optional[str] = "application/json", indent: bool = True
+    ) -> None:
+        # indent=False for machine-only artifacts: compact output is smaller on disk and on the wire.
+        self.write_bytes(key, json_codec.dumps(payload, indent=indent), content_type=content_type)
 
     def list_runs(self) -> List[str]:
         raise NotImplementedError
 
+    def delete(self, key: str) -> bool:
+        """
+        Deletes a single object. Returns True if it existed, False otherwise.
+        """
+        raise NotImplementedError
+
     def delete_prefix(self, prefix: str) -> None:
         raise NotImplementedError
 
@@ -65,37 +200,127 @@ class ArtifactStore:
         raise NotImplementedError
 
 
+def _stat_signature(stat: os.stat_result) -> tuple:
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def file_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """
+    (mtime_ns, size) of a local file for use in cache keys, or None when it cannot be stat'ed.
+    """
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 class LocalArtifactStore(ArtifactStore):
+    # Small artifacts (manifests, specs) kept in memory, keyed on their stat signature.
+    READ_CACHE_ENTRIES = 128
+    READ_CACHE_MAX_BYTES = 1 << 20
+
     def __init__(self, root_dir: str):
         self.root_dir = os.path.abspath(root_dir)
+        self._read_cache: "OrderedDict[str, Tuple[tuple, bytes]]" = OrderedDict()
+        self._read_cache_lock = threading.Lock()
 
     def _path(self, key: str) -> str:
         normalized = key.lstrip("/").replace("/", os.sep)
         return os.path.join(self.root_dir, normalized)
 
+    def _write_atomic(self, key: str, data, mode: str, encoding: Optional[str] = None) -> None:
+        """
+        Writes a sibling temp file and renames it over the target, so readers in other sessions never
+        see a partially written artifact. No fsync: the rename is what readers rely on, and a
+        per-write disk flush would only add crash durability.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = _temp_path(path)
+        try:
+            with open(tmp_path, mode, encoding=encoding) as handle:
+                if hasattr(data, "read"):
+                    shutil.copyfileobj(data, handle, length=1 << 20)
+                else:
+                    handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     def read_text(self, key: str) -> str:
         with open(self._path(key), "r", encoding="utf-8") as handle:
             return handle.read()
 
     def write_text(self, key: str, text: str, content_type: Optional[str] = None) -> None:
-        path = self._path(key)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as handle:
-            handle.write(text)
+        self._write_atomic(key, text, "w", encoding="utf-8")
 
     def read_bytes(self, key: str) -> bytes:
+        """
+        Unchanged small files are served from memory: the entry is reused while the file's
+        (mtime_ns, size, inode) still match. Atomic writes replace the inode on every write.
+        """
+        path = self._path(key)
+        with self._read_cache_lock:
+            cached = self._read_cache.get(path)
+        if cached is not None and cached[0] == _stat_signature(os.stat(path)):
+            with self._read_cache_lock:
+                if path in self._read_cache:
+                    self._read_cache.move_to_end(path)
+            return cached[1]
+        with open(path, "rb") as handle:
+            # Signature of the file actually read, in case it was replaced since the stat.
+            signature = _stat_signature(os.fstat(handle.fileno()))
+            data = handle.read()
+        if len(data) <= self.READ_CACHE_MAX_BYTES:
+            with self._read_cache_lock:
+                self._read_cache[path] = (signature, data)
+                self._read_cache.move_to_end(path)
+                while len(self._read_cache) > self.READ_CACHE_ENTRIES:
+                    self._read_cache.popitem(last=False)
+        return data
+
+    def write_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        self._write_atomic(key, data, "wb")
+
+    def write_stream(self, key: str, source: BinaryIO, content_type: Optional[str] = None) -> None:
+        self._write_atomic(key, source, "wb")
+
+    def read_tail(self, key: str, nbytes: int) -> bytes:
         with open(self._path(key), "rb") as handle:
+            size = handle.seek(0, os.SEEK_END)
+            handle.seek(max(0, size - nbytes))
             return handle.read()
 
-    def write_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+    def append_line(self, key: str, line: str, content_type: Optional[str] = None) -> None:
         path = self._path(key)
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "wb") as handle:
+        data = f"{line}\n".encode("utf-8")
+        with open(path, "a+b") as handle:
+            if handle.seek(0, os.SEEK_END):
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b"\n":
+                    data = b"\n" + data
+            # One O_APPEND write per line, so concurrent appenders do not interleave within a line.
             handle.write(data)
 
+    def open_stream(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
     def exists(self, key: str) -> bool:
         return os.path.exists(self._path(key))
 
+    def version(self, key: str) -> Optional[object]:
+        try:
+            return _stat_signature(os.stat(self._path(key)))
+        except FileNotFoundError:
+            return None
+
     def list(self, prefix: str = "") -> List[str]:
         prefix = prefix.lstrip("/").replace("\\", "/")
         keys: List[str] = []
@@ -105,25 +330,45 @@ class LocalArtifactStore(ArtifactStore):
         if os.path.isfile(root):
             keys.append(prefix or os.path.basename(root))
             return keys
-        for dirpath, _, filenames in os.walk(root):
-            for filename in filenames:
-                absolute = os.path.join(dirpath, filename)
-                rel = os.path.relpath(absolute, self.root_dir)
-                keys.append(rel.replace("\\", "/"))
+        base = os.path.relpath(root, self.root_dir).replace("\\", "/")
+        # scandir entries carry their dirent type, so neither files nor directories need a stat;
+        # keys are built from the directory's key instead of a relpath() per file.
+        pending = [(root, "" if base == "." else base)]
+        while pending:
+            path, key_prefix = pending.pop()
+            subdirs = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    key = f"{key_prefix}/{entry.name}" if key_prefix else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, key))
+                    elif not entry.is_dir() and not entry.name.startswith(_TEMP_PREFIX):
+                        # Like os.walk: symlinked files are listed, symlinked directories skipped.
+                        # In-flight (or orphaned) atomic-write temp files are not artifacts.
+                        keys.append(key)
+            pending.extend(reversed(subdirs))
         return keys
 
     def uri_for_key(self, key: str) -> str:
         return f"file://{self._path(key)}"
 
+    def list_top_level(self, prefix: str = "") -> List[str]:
+        try:
+            # DirEntry.is_dir() uses the dirent type, so no extra stat per directory.
+            with os.scandir(self._path(prefix.strip("/"))) as entries:
+                return sorted(entry.name for entry in entries if entry.is_dir())
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
     def list_runs(self) -> List[str]:
-        runs: List[str] = []
-        if not os.path.exists(self.root_dir):
-            return runs
-        for entry in os.listdir(self.root_dir):
-            path = os.path.join(self.root_dir, entry)
-            if os.path.isdir(path):
-                runs.append(entry)
-        return sorted(runs)
+        return self.list_top_level("")
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
 
     def delete_prefix(self, prefix: str) -> None:
         target = self._path(prefix)
@@ -138,6 +383,24 @@ class LocalArtifactStore(ArtifactStore):
     def create_if_absent(self, key: str, data: bytes, content_type: Optional[str] = None) -> bool:
         path = self._path(key)
         os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write the full payload to a temp file first and hard-link it into place: link() fails if the
+        # target exists, and a reader that wins the race never sees an empty or half-written file.
+        tmp_path = _temp_path(path)
+        try:
+            with open(tmp_path, "wb") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            try:
+                os.link(tmp_path, path)
+                return True
+            except FileExistsError:
+                return False
+            except OSError:
+                pass  # Filesystem without hard links; fall back to exclusive create.
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         try:
             fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
             with os.fdopen(fd, "wb") as handle:
@@ -147,8 +410,27 @@ class LocalArtifactStore(ArtifactStore):
             return False
 
 
+def _pooled_storage_client(storage):
+    """
+    storage.Client on an AuthorizedSession with a larger urllib3 pool, handed over through the
+    client's _http constructor argument. The requests default keeps 10 connections per host, so
+    concurrent reads and uploads from one shared store otherwise queue for a socket or reconnect.
+    Emulator setups keep the default client and its anonymous credentials.
+    """
+    if os.environ.get("STORAGE_EMULATOR_HOST"):
+        return storage.Client()
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    session.mount("https://", HTTPAdapter(pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE))
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+
 class GCSArtifactStore(ArtifactStore):
-    def __init__(self, bucket: str, prefix: str = "", client=None):
+    def __init__(self, bucket: str, prefix: str = "", client=None, chunk_size: Optional[int] = None):
         try:
             from google.cloud import storage
             from google.api_core import exceptions as gcs_exceptions
@@ -157,69 +439,179 @@ class GCSArtifactStore(ArtifactStore):
 
         self.bucket_name = bucket
         self.prefix = prefix.strip("/")
-        self.client = client or storage.Client()
+        # Built once; _full_key/_strip_prefix run per key in every listing.
+        self._prefix_slash = f"{self.prefix}/" if self.prefix else ""
+        if client is None:
+            client = _pooled_storage_client(storage)
+        self.client = client
         self.bucket = self.client.bucket(self.bucket_name)
+        # None keeps the client defaults: single-request downloads and multipart uploads up to 8 MiB,
+        # resumable 100 MiB chunks above that. Set a multiple of 256 KiB to bound memory per request.
+        self.chunk_size = chunk_size
         self._gcs_exceptions = gcs_exceptions
 
+    def _blob(self, key: str):
+        return self.bucket.blob(self._full_key(key), chunk_size=self.chunk_size)
+
     def _full_key(self, key: str) -> str:
-        normalized = key.lstrip("/")
-        if self.prefix:
-            return f"{self.prefix}/{normalized}"
-        return normalized
+        return self._prefix_slash + key.lstrip("/")
 
     def _strip_prefix(self, full_key: str) -> str:
-        if self.prefix and full_key.startswith(f"{self.prefix}/"):
-            return full_key[len(self.prefix) + 1 :]
+        if full_key.startswith(self._prefix_slash):
+            return full_key[len(self._prefix_slash) :]
         return full_key
 
     def read_text(self, key: str) -> str:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         return blob.download_as_text(encoding="utf-8")
 
     def write_text(self, key: str, text: str, content_type: Optional[str] = None) -> None:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         blob.upload_from_string(text, content_type=content_type or "text/plain")
 
     def read_bytes(self, key: str) -> bytes:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         return blob.download_as_bytes()
 
     def write_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         blob.upload_from_string(data, content_type=content_type)
 
+    def write_stream(self, key: str, source: BinaryIO, content_type: Optional[str] = None) -> None:
+        blob = self._blob(key)
+        blob.upload_from_file(source, content_type=content_type)
+
+    def read_tail(self, key: str, nbytes: int) -> bytes:
+        blob = self._blob(key)
+        try:
+            # Negative start maps to a suffix range request ("bytes=-N").
+            return blob.download_as_bytes(start=-nbytes)
+        except self._gcs_exceptions.RequestRangeNotSatisfiable:
+            return b""
+
+    def append_line(self, key: str, line: str, content_type: Optional[str] = None) -> None:
+        """
+        Server-side compose of the object with a one-line staging blob, so only the new line is
+        uploaded. The compose is conditioned on the generation the tail was read from; when another
+        writer appended in between, the append is retried on top of that writer's line.
+        """
+        data = f"{line}\n".encode("utf-8")
+        blob = self._blob(key)
+        blob.content_type = content_type
+        staging = self.bucket.blob(f"{blob.name}.append-{uuid.uuid4().hex}")
+        staged = None
+        try:
+            for _attempt in range(GCS_APPEND_ATTEMPTS):
+                generation = self.version(key)
+                if generation is None:
+                    if self.create_if_absent(key, data, content_type=content_type):
+                        return
+                    continue
+                tail = self.read_tail(key, 1)
+                payload = b"\n" + data if tail and tail != b"\n" else data
+                if payload != staged:
+                    staging.upload_from_string(payload, content_type=content_type)
+                    staged = payload
+                try:
+                    blob.compose([blob, staging], if_generation_match=generation)
+                    return
+                except self._gcs_exceptions.PreconditionFailed:
+                    continue
+            raise RuntimeError(f"Could not append to {key}: it kept changing under concurrent writers")
+        finally:
+            if staged is not None:
+                staging.delete()
+
+    def open_stream(self, key: str) -> BinaryIO:
+        blob = self._blob(key)
+        return blob.open("rb")
+
+    def size(self, key: str) -> int:
+        blob = self.bucket.get_blob(self._full_key(key))
+        if blob is None:
+            raise FileNotFoundError(key)
+        return blob.size
+
     def exists(self, key: str) -> bool:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         return blob.exists()
 
+    def version(self, key: str) -> Optional[object]:
+        # Every upload of an object creates a new generation.
+        blob = self.bucket.get_blob(self._full_key(key))
+        return None if blob is None else blob.generation
+
+    def write_many(self, items: Iterable[Tuple[str, bytes, Optional[str]]]) -> None:
+        items = list(items)
+        if len(items) < 2:
+            return super().write_many(items)
+        # Workers share self.bucket and so the client's pooled HTTPS session.
+        with ThreadPoolExecutor(max_workers=min(GCS_UPLOAD_WORKERS, len(items))) as pool:
+            futures = [pool.submit(self.write_bytes, key, data, content_type) for key, data, content_type in items]
+        for future in futures:
+            future.result()
+
+    def exists_many(self, keys: Iterable[str]) -> Set[str]:
+        keys = set(keys)
+        if len(keys) < 2:
+            return {key for key in keys if self.exists(key)}
+        # One names-only listing of the keys' common "directory" answers every membership check.
+        common = os.path.commonprefix(sorted(keys))
+        common = common[: common.rfind("/") + 1]
+        search_prefix = self._full_key(common)
+        blobs = self.client.list_blobs(self.bucket, prefix=search_prefix, fields="items(name),nextPageToken")
+        listed = {self._strip_prefix(blob.name) for blob in blobs}
+        return keys & listed
+
     def list(self, prefix: str = "") -> List[str]:
         search_prefix = self._full_key(prefix)
         blobs = self.client.list_blobs(self.bucket, prefix=search_prefix)
-        keys: List[str] = []
-        for blob in blobs:
-            if blob.name.endswith("/"):
-                continue
-            keys.append(self._strip_prefix(blob.name))
-        return keys
+        strip = self._strip_prefix
+        return [strip(blob.name) for blob in blobs if not blob.name.endswith("/")]
 
     def uri_for_key(self, key: str) -> str:
         full_key = self._full_key(key)
         return f"gs://{self.bucket_name}/{full_key}"
 
+    def list_top_level(self, prefix: str = "") -> List[str]:
+        # Delimiter listing returns only first-level "directories" instead of every artifact blob.
+        base = prefix.strip("/")
+        search_prefix = self._full_key(f"{base}/" if base else "")
+        iterator = self.client.list_blobs(self.bucket, prefix=search_prefix, delimiter="/")
+        for _page in iterator.pages:
+            pass
+        names = {name[len(search_prefix) :].rstrip("/") for name in iterator.prefixes}
+        return sorted(name for name in names if name)
+
     def list_runs(self) -> List[str]:
-        runs: set = set()
-        blobs = self.client.list_blobs(self.bucket, prefix=self._full_key(""))
-        for blob in blobs:
-            name = self._strip_prefix(blob.name)
-            if "/" in name:
-                runs.add(name.split("/", 1)[0])
-        return sorted(list(runs))
+        return self.list_top_level("")
+
+    def delete(self, key: str) -> bool:
+        blob = self._blob(key)
+        try:
+            blob.delete()
+        except self._gcs_exceptions.NotFound:
+            return False
+        return True
 
     def delete_prefix(self, prefix: str) -> None:
         full_prefix = self._full_key(prefix)
-        blobs = list(self.client.list_blobs(self.bucket, prefix=full_prefix))
-        if blobs:
-            self.bucket.delete_blobs(blobs)
+        # Names are all a delete needs; nextPageToken keeps the listing paginating.
+        blobs = self.client.list_blobs(self.bucket, prefix=full_prefix, fields="items(name),nextPageToken")
+        chunk = []
+        for blob in blobs:
+            chunk.append(blob)
+            if len(chunk) == GCS_DELETE_BATCH_SIZE:
+                self._delete_batch(chunk)
+                chunk = []
+        if chunk:
+            self._delete_batch(chunk)
+
+    def _delete_batch(self, blobs) -> None:
+        # One multipart HTTP request per chunk instead of one DELETE round-trip per object.
+        with self.client.batch():
+            for blob in blobs:
+                blob.delete()
 
     def run_exists(self, run_id: str) -> bool:
         full_prefix = self._full_key(run_id)
@@ -227,7 +619,7 @@ class GCSArtifactStore(ArtifactStore):
         return any(True for _ in iterator)
 
     def create_if_absent(self, key: str, data: bytes, content_type: Optional[str] = None) -> bool:
-        blob = self.bucket.blob(self._full_key(key))
+        blob = self._blob(key)
         try:
             blob.upload_from_string(data, content_type=content_type or "application/octet-stream", if_generation_match=0)
             return True
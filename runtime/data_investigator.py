@@ -1,18 +1,34 @@
 import os
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import pandas as pd
 
+from runtime.artifact_store import file_fingerprint
+from runtime.table_reader import read_csv_strings, read_excel
+
+
+def clear_caches() -> None:
+    _scan_file_structure.cache_clear()
+    _get_column_inventory.cache_clear()
+
 
 def scan_file_structure(file_path: str, sample_rows: int = 100, sheet_name: Optional[str] = None) -> int:
     """
-    Scans the file to suggest the header row index based on data density.
+    Scans the file to suggest the header row index based on data density. Results are memoized per
+    (path, mtime, size), so an unchanged workbook is parsed once per process.
     """
+    file_path = os.path.abspath(file_path)
+    return _scan_file_structure(file_path, file_fingerprint(file_path), sample_rows, sheet_name)
+
+
+@lru_cache(maxsize=64)
+def _scan_file_structure(file_path: str, fingerprint: Optional[tuple], sample_rows: int, sheet_name: Optional[str]) -> int:
     ext = os.path.splitext(file_path)[1].lower()
     if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(file_path, sheet_name=sheet_name or 0, header=None, nrows=sample_rows, dtype=object)
+        df = read_excel(file_path, sheet_name=sheet_name or 0, header=None, nrows=sample_rows, dtype=object)
     elif ext == ".csv":
-        df = pd.read_csv(file_path, header=None, nrows=sample_rows, dtype=object, keep_default_na=False)
+        df = read_csv_strings(file_path, nrows=sample_rows)
     else:
         raise ValueError(f"Unsupported input type: {file_path}")
     df = df.fillna("")
@@ -25,30 +41,41 @@ def scan_dataframe_structure(df: pd.DataFrame, sample_rows: int = 100) -> int:
     """
     if df.empty:
         return 0
-    sample = df.head(sample_rows)
-    row_density = sample.apply(lambda row: row.astype(str).str.strip().ne("").sum(), axis=1)
-    col_count = sample.shape[1]
-
-    suggested_header = 0
-    for i in range(len(row_density) - 1):
-        if (row_density.iloc[i] > col_count * 0.5) and (row_density.iloc[i + 1] > col_count * 0.5):
-            suggested_header = int(i)
-            break
-    return suggested_header
+    sample = df.head(sample_rows).fillna("")
+    threshold = sample.shape[1] * 0.5
+    # Row by row with an early exit: the first dense pair is usually within the first few rows, and
+    # converting the whole sample to a string array up front cost more than the loop saves.
+    previous_dense = False
+    for row_idx, row in enumerate(sample.itertuples(index=False, name=None)):
+        dense = sum(1 for value in row if str(value).strip()) > threshold
+        if dense and previous_dense:
+            return row_idx - 1
+        previous_dense = dense
+    return 0
 
 
 def get_column_inventory(file_path: str, header_row: int, sheet_name: Optional[str] = None) -> List[dict]:
     """
-    Returns a list of column index, name, and sample value.
+    Returns a list of column index, name, and sample value. Memoized like scan_file_structure.
     """
+    file_path = os.path.abspath(file_path)
+    inventory = _get_column_inventory(file_path, file_fingerprint(file_path), header_row, sheet_name)
+    # Fresh dicts per call so callers cannot mutate the cached entries.
+    return [dict(item) for item in inventory]
+
+
+@lru_cache(maxsize=64)
+def _get_column_inventory(
+    file_path: str, fingerprint: Optional[tuple], header_row: int, sheet_name: Optional[str]
+) -> Tuple[dict, ...]:
     ext = os.path.splitext(file_path)[1].lower()
     if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(file_path, sheet_name=sheet_name or 0, header=header_row, nrows=1, dtype=object)
+        df = read_excel(file_path, sheet_name=sheet_name or 0, header=header_row, nrows=1, dtype=object)
     elif ext == ".csv":
         df = pd.read_csv(file_path, header=header_row, nrows=1, dtype=object, keep_default_na=False)
     else:
         raise ValueError(f"Unsupported input type: {file_path}")
-    return get_column_inventory_from_df(df)
+    return tuple(get_column_inventory_from_df(df))
 
 
 def get_column_inventory_from_df(df: pd.DataFrame) -> List[dict]:
@@ -1,8 +1,10 @@
 import re
-from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+_NON_NUMERIC = re.compile(r"[^\d.\-]")
+
 
 def read_with_flattened_headers(file_path: str, header_row_start: int, header_row_end: int) -> list:
     """
@@ -16,15 +18,10 @@ def read_with_flattened_headers(file_path: str, header_row_start: int, header_ro
         dtype=object,
     )
     df_headers = df_headers.ffill(axis=1)
-    new_headers = []
-    for col_idx in range(df_headers.shape[1]):
-        parts = []
-        for row_idx in range(df_headers.shape[0]):
-            val = str(df_headers.iloc[row_idx, col_idx]).strip()
-            if val and val.lower() != "nan":
-                parts.append(val)
-        new_headers.append("_".join(parts))
-    return new_headers
+    # Stringify, strip and filter the whole header block at once; only the per-column join stays in Python.
+    cells = np.char.strip(df_headers.to_numpy().astype(str))
+    keep = (cells != "") & (np.char.lower(cells) != "nan")
+    return ["_".join(cells[keep[:, col_idx], col_idx]) for col_idx in range(cells.shape[1])]
 
 
 def clean_series(series: pd.Series, target_type: str) -> pd.Series:
@@ -32,19 +29,11 @@ def clean_series(series: pd.Series, target_type: str) -> pd.Series:
     Forces a column into the desired type.
     """
     if target_type == "number":
-        def clean_num(x: object) -> Optional[float]:
-            if pd.isna(x):
-                return None
-            s = str(x)
-            s = re.sub(r"[^\d.\-]", "", s)
-            if not s:
-                return None
-            try:
-                return float(s)
-            except Exception:
-                return None
-
-        return series.apply(clean_num)
+        # Strip everything but digits, dots and minus signs in one vectorized pass, then parse;
+        # blanks and leftovers that are not a number (e.g. "1.2.3") become NaN.
+        cleaned = series.astype("string").str.replace(_NON_NUMERIC, "", regex=True)
+        cleaned = cleaned.mask(cleaned.eq(""))
+        return pd.to_numeric(cleaned, errors="coerce").astype("float64")
 
     if target_type == "date":
         return pd.to_datetime(series, errors="coerce")
@@ -56,6 +45,14 @@ def clean_series(series: pd.Series, target_type: str) -> pd.Series:
 
 
 def clean_value(value: object, target_type: str) -> object:
+    if target_type == "number":
+        if pd.isna(value):
+            return None
+        text = _NON_NUMERIC.sub("", str(value))
+        try:
+            return float(text) if text else None
+        except ValueError:
+            return None
     series = pd.Series([value])
     cleaned = clean_series(series, target_type)
     return cleaned.iloc[0]
@@ -4,17 +4,37 @@ import io
 import json
 import os
 import re
+import shutil
 import tempfile
+import threading
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from itertools import islice, zip_longest
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 
+try:  # Optional dependency: Parquet mirrors of tabular outputs.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only when pyarrow is missing
+    pa = None
+    pq = None
+
+from runtime import json_codec
 from runtime.artifact_store import ArtifactStore, build_artifact_store, is_gcs_uri, parse_gcs_uri
 from runtime.data_janitor import clean_series, clean_value
+from runtime.table_reader import open_excel
 
 ARTIFACT_PREFIX = "artifacts"
+_NUMBER_PATTERN = re.compile(r"(-?\d+(?:\.\d+)?)")
+# Data rows are read, cleaned and encoded this many at a time, so no step holds the whole table.
+DATA_ROW_CHUNK_SIZE = 131_072
+# Encoded outputs stay in memory up to this size and spill to a temp file beyond it.
+_OUTPUT_SPOOL_BYTES = 64 << 20
+# output_format values: "csv" writes output/clean.csv only; "parquet" also mirrors it as
+# output/clean.parquet (zstd), falling back to CSV only when pyarrow is missing.
+OUTPUT_FORMATS = ("csv", "parquet")
 
 
 @dataclass
@@ -28,19 +48,19 @@ class RunStore:
     def store_key(self, filename: str) -> str:
         return f"{self.run_id}/{filename}"
 
-    def write_json(self, filename: str, payload: dict) -> None:
-        self.store.write_text(
-            self.store_key(filename),
-            json.dumps(payload, indent=2, ensure_ascii=True),
-            content_type="application/json",
-        )
+    def write_json(self, filename: str, payload: dict, indent: bool = True) -> None:
+        self.store.write_json(self.store_key(filename), payload, indent=indent)
 
     def read_json(self, filename: str) -> dict:
-        return json.loads(self.store.read_text(self.store_key(filename)))
+        return self.store.read_json(self.store_key(filename))
 
     def exists(self, filename: str) -> bool:
         return self.store.exists(self.store_key(filename))
 
+    def existing(self, *filenames: str) -> Set[str]:
+        present = self.store.exists_many(self.store_key(name) for name in filenames)
+        return {name for name in filenames if self.store_key(name) in present}
+
     def uri_for(self, filename: str) -> str:
         return self.store.uri_for_key(self.store_key(filename))
 
@@ -110,8 +130,10 @@ def _hash_bytes(data: bytes) -> str:
 
 
 def _hash_file(path: str) -> str:
-    hasher = hashlib.sha256()
     with open(path, "rb") as handle:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+: read/update loop runs in C without the GIL.
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+        hasher = hashlib.sha256()
         for chunk in iter(lambda: handle.read(1024 * 1024), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
@@ -133,15 +155,7 @@ def _append_shadow(run_store: RunStore, event: str, details: dict) -> None:
     }
     entry.update(details)
     line = json.dumps(entry, ensure_ascii=True)
-    if run_store.store.exists(key):
-        existing = run_store.store.read_text(key)
-        separator = ""
-        if existing and not existing.endswith("\n"):
-            separator = "\n"
-        content = f"{existing}{separator}{line}\n"
-    else:
-        content = f"{line}\n"
-    run_store.store.write_text(key, content, content_type="application/json")
+    run_store.store.append_line(key, line, content_type="application/json")
 
 
 RECIPE_INDEX_KEY = "recipe_store/recipe_index.json"
@@ -155,18 +169,32 @@ def _recipe_artifact_key(structural_hash: str) -> str:
     return f"{ARTIFACT_PREFIX}/{_recipe_store_key(structural_hash)}"
 
 
+# Parsed recipe index per store location: {uri: (version token, index)}. Shared by concurrent
+# sessions; the lock guards the dict and serializes read-modify-write updates of the index within
+# this process. Saves from separate processes are not coordinated: the last write wins.
+_recipe_index_cache: Dict[str, Tuple[object, Dict[str, dict]]] = {}
+_recipe_index_lock = threading.RLock()
+
+
 def _load_recipe_index(store: ArtifactStore) -> Dict[str, dict]:
-    if not store.exists(RECIPE_INDEX_KEY):
+    # One version lookup replaces the exists() check; the index is only re-read when it has changed.
+    version = store.version(RECIPE_INDEX_KEY)
+    if version is None:
         return {}
-    return json.loads(store.read_text(RECIPE_INDEX_KEY))
+    uri = store.uri_for_key(RECIPE_INDEX_KEY)
+    with _recipe_index_lock:
+        cached = _recipe_index_cache.get(uri)
+        if cached is None or cached[0] != version:
+            cached = (version, store.read_json(RECIPE_INDEX_KEY))
+            _recipe_index_cache[uri] = cached
+    # Entries are flat dicts; copy them so callers can update the index before saving it.
+    return {structural_hash: dict(entry) for structural_hash, entry in cached[1].items()}
 
 
 def _save_recipe_index(store: ArtifactStore, payload: Dict[str, dict]) -> None:
-    store.write_text(
-        RECIPE_INDEX_KEY,
-        json.dumps(payload, indent=2, ensure_ascii=True),
-        content_type="application/json",
-    )
+    with _recipe_index_lock:
+        store.write_json(RECIPE_INDEX_KEY, payload, indent=False)
+        _recipe_index_cache.pop(store.uri_for_key(RECIPE_INDEX_KEY), None)
 
 
 def _input_temp_dir(run_id: str) -> str:
@@ -209,11 +237,10 @@ def _prepare_local_input(
     if input_artifact_key:
         store_key = _store_key_from_artifact_key(input_artifact_key)
         if run_store.store.exists(store_key):
-            data = run_store.store.read_bytes(store_key)
             filename = os.path.basename(store_key)
             local_path = os.path.join(_input_temp_dir(run_store.run_id), filename or "input")
-            with open(local_path, "wb") as handle:
-                handle.write(data)
+            with run_store.store.open_stream(store_key) as source, open(local_path, "wb") as handle:
+                shutil.copyfileobj(source, handle, length=1 << 20)
             return local_path
 
     return None
@@ -223,8 +250,7 @@ def _persist_input_copy(run_store: RunStore, local_input_path: str, fallback_nam
     filename = os.path.basename(local_input_path) or fallback_name
     store_key = run_store.store_key(f"input/{filename}")
     with open(local_input_path, "rb") as handle:
-        data = handle.read()
-    run_store.store.write_bytes(store_key, data)
+        run_store.store.write_stream(store_key, handle)
     return run_store.artifact_key(f"input/{filename}")
 
 
@@ -239,7 +265,7 @@ def _lookup_recipe_for_hash(store: ArtifactStore, structural_hash: str) -> Optio
     store_key = _store_key_from_artifact_key(recipe_key)
     if not store.exists(store_key):
         return None
-    return json.loads(store.read_text(store_key))
+    return store.read_json(store_key)
 
 
 def _store_recipe_for_hash(
@@ -249,18 +275,17 @@ def _store_recipe_for_hash(
     run_id: str,
 ) -> str:
     recipe_store_key = _recipe_store_key(structural_hash)
-    store.write_text(
-        recipe_store_key,
-        json.dumps(recipe, indent=2, ensure_ascii=True),
-        content_type="application/json",
-    )
-    index = _load_recipe_index(store)
-    index[structural_hash] = {
+    store.write_json(recipe_store_key, recipe)
+    entry = {
         "recipe_key": _recipe_artifact_key(structural_hash),
         "stored_at": datetime.utcnow().isoformat() + "Z",
         "source_run_id": run_id,
     }
-    _save_recipe_index(store, index)
+    # Under the lock no other session of this process can save in between.
+    with _recipe_index_lock:
+        index = _load_recipe_index(store)
+        index[structural_hash] = entry
+        _save_recipe_index(store, index)
     return _recipe_artifact_key(structural_hash)
 
 
@@ -305,24 +330,6 @@ def _select_candidate(candidates: List[dict]) -> Optional[dict]:
     return max(candidates, key=lambda c: c.get("confidence", 0.0))
 
 
-def _infer_dtype(values: List[object]) -> str:
-    cleaned = [v for v in values if str(v).strip() != ""]
-    if not cleaned:
-        return "string"
-    if all(_numeric_like(v) for v in cleaned):
-        return "number"
-    return "string"
-
-
-def _clean_number_value(value: object) -> str:
-    text = str(value).strip()
-    if not text:
-        return ""
-    normalized = text.replace(",", "")
-    match = re.search(r"-?\d+(?:\.\d+)?", normalized)
-    return match.group(0) if match else ""
-
-
 def _clean_date_value(value: object) -> str:
     text = str(value).strip()
     if not text:
@@ -334,30 +341,124 @@ def _clean_date_value(value: object) -> str:
         return text
 
 
+def _clean_number_column(values: pd.Series) -> pd.Series:
+    # First signed decimal in each cell once thousands separators are dropped; "" when there is none.
+    text = values.astype(str).str.replace(",", "", regex=False)
+    return text.str.extract(_NUMBER_PATTERN, expand=False).fillna("")
+
+
+def _clean_date_column(values: pd.Series) -> pd.Series:
+    # Parsed once per distinct value: per-value parsing keeps each cell's own format inference, and
+    # date columns repeat heavily, so this is far fewer pd.to_datetime calls than one per cell.
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    cleaned = pd.Series([_clean_date_value(value) for value in uniques], dtype=object)
+    return pd.Series(cleaned.to_numpy()[codes], index=values.index, dtype=object)
+
+
 def _apply_type_enforcement(rows: List[List[object]], types: List[str]) -> List[List[object]]:
-    cleaned_rows = []
-    for row in rows:
-        cleaned = []
-        for idx, value in enumerate(row):
-            dtype = types[idx] if idx < len(types) else "string"
-            if dtype == "number":
-                cleaned.append(_clean_number_value(value))
-            elif dtype == "date":
-                cleaned.append(_clean_date_value(value))
-            else:
-                cleaned.append(value)
-        cleaned_rows.append(cleaned)
-    return cleaned_rows
+    """
+    Cleans number and date columns of rectangular rows column by column; other columns pass through.
+    """
+    if not rows:
+        return []
+    frame = pd.DataFrame(rows, dtype=object)
+    for idx, dtype in enumerate(types[: frame.shape[1]]):
+        if dtype == "number":
+            frame[idx] = _clean_number_column(frame[idx])
+        elif dtype == "date":
+            frame[idx] = _clean_date_column(frame[idx])
+    return frame.values.tolist()
+
+
+class _TableOutput:
+    """
+    Encodes an output table one chunk of rows at a time: the CSV and, when parquet is set and pyarrow
+    is available, its Parquet mirror (one row group per chunk) go to spooled temp files, and per-column
+    counters replace the full columns that schema inference would otherwise need.
+    """
+
+    def __init__(self, headers: List[str], parquet: bool = False):
+        self.headers = headers
+        self.row_count = 0
+        self._min_width: Optional[int] = None
+        self._filled = [0] * len(headers)
+        self._numeric = [True] * len(headers)
+        self.csv_file = tempfile.SpooledTemporaryFile(max_size=_OUTPUT_SPOOL_BYTES)
+        self._text = io.TextIOWrapper(self.csv_file, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(headers)
+        self.parquet_file = None
+        self._parquet = None
+        if parquet and pq is not None:
+            self._schema = pa.schema([(str(header), pa.string()) for header in headers])
+            self.parquet_file = tempfile.SpooledTemporaryFile(max_size=_OUTPUT_SPOOL_BYTES)
+            self._parquet = pq.ParquetWriter(self.parquet_file, self._schema, compression="zstd")
+
+    def write(self, rows: List[List[object]]) -> None:
+        if not rows:
+            return
+        self._csv.writerows(rows)
+        width = min(len(row) for row in rows)
+        self._min_width = width if self._min_width is None else min(self._min_width, width)
+        self.row_count += len(rows)
+        columns = list(zip_longest(*rows, fillvalue=""))
+        arrays = []
+        for idx in range(len(self.headers)):
+            values = columns[idx] if idx < len(columns) else ("",) * len(rows)
+            filled = [value for value in values if str(value).strip() != ""]
+            self._filled[idx] += len(filled)
+            if self._numeric[idx]:
+                self._numeric[idx] = all(_numeric_like(value) for value in filled)
+            if self._parquet is not None:
+                arrays.append(pa.array(["" if value is None else str(value) for value in values], type=pa.string()))
+        if self._parquet is not None:
+            self._parquet.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def column_profile(self, idx: int) -> Tuple[str, bool]:
+        """
+        (dtype, required) for column idx: "number" when every non-blank value is numeric-like, and
+        required when no row leaves it blank. Columns missing from any row count as "string", optional.
+        """
+        if not self.row_count or idx >= self._min_width:
+            return "string", False
+        filled = self._filled[idx]
+        return ("number" if filled and self._numeric[idx] else "string"), filled == self.row_count
+
+    def save(self, run_store: RunStore, csv_name: str, parquet_name: str) -> List[str]:
+        """
+        Finishes the encodings and streams them to the store; returns the run-relative names written.
+        """
+        self._text.flush()
+        self._text.detach()
+        saved = [csv_name]
+        self.csv_file.seek(0)
+        run_store.store.write_stream(run_store.store_key(csv_name), self.csv_file, content_type="text/csv")
+        self.csv_file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+            self.parquet_file.seek(0)
+            run_store.store.write_stream(
+                run_store.store_key(parquet_name), self.parquet_file, content_type="application/vnd.apache.parquet"
+            )
+            self.parquet_file.close()
+            saved.append(parquet_name)
+        return saved
+
+
+def _map_adapter_rows(rows: List[List[object]], sources: List[Optional[int]]) -> List[List[object]]:
+    # sources[i] is the input column feeding output column i; None or out-of-range cells become "".
+    return [[row[source] if source is not None and source < len(row) else "" for source in sources] for row in rows]
 
 
 def _write_schema_and_output(
     run_store: RunStore,
-    data_rows: List[List[object]],
+    data_chunks: Iterable[List[List[object]]],
     headers: List[str],
     adapter_spec: Optional[Dict[str, object]] = None,
+    output_format: str = "csv",
 ) -> None:
-    rows = data_rows or []
-
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output_format: {output_format}")
     if adapter_spec:
         canonical_fields = adapter_spec.get("canonical_fields") or []
         field_map = adapter_spec.get("field_map") or {}
@@ -367,18 +468,8 @@ def _write_schema_and_output(
         if not output_headers:
             output_headers = list(field_map.keys())
         header_index = {name: idx for idx, name in enumerate(headers)}
-        mapped_rows: List[List[object]] = []
-        for row in rows:
-            mapped_row = []
-            for canonical in output_headers:
-                source = field_map.get(canonical)
-                value = ""
-                if source in header_index and header_index[source] < len(row):
-                    value = row[header_index[source]]
-                mapped_row.append(value)
-            mapped_rows.append(mapped_row)
+        sources = [header_index.get(field_map.get(canonical)) for canonical in output_headers]
         types_by_header = [types.get(header, "string") for header in output_headers]
-        rows = _apply_type_enforcement(mapped_rows, types_by_header)
         headers = output_headers
         schema_fields = []
         for canonical in headers:
@@ -394,13 +485,17 @@ def _write_schema_and_output(
             )
         schema_layer = "adapter"
         evidence_keys = adapter_spec.get("evidence_keys") or [run_store.artifact_key("header_spec.json")]
-    else:
+
+    table = _TableOutput(headers, parquet=output_format == "parquet")
+    for chunk in data_chunks:
+        if adapter_spec:
+            chunk = _apply_type_enforcement(_map_adapter_rows(chunk, sources), types_by_header)
+        table.write(chunk)
+
+    if not adapter_spec:
         schema_fields = []
-        columns = list(zip(*rows)) if rows else [[] for _ in headers]
         for idx, header in enumerate(headers):
-            values = list(columns[idx]) if idx < len(columns) else []
-            dtype = _infer_dtype(values)
-            required = all(str(v).strip() != "" for v in values) if values else False
+            dtype, required = table.column_profile(idx)
             schema_fields.append(
                 {
                     "source": header,
@@ -422,24 +517,16 @@ def _write_schema_and_output(
         "evidence_keys": evidence_keys,
         "refusal_reason": None,
     }
-    run_store.write_json("schema_spec.json", schema_spec)
 
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    writer.writerow(headers)
-    writer.writerows(rows)
-    run_store.store.write_bytes(
-        run_store.store_key("output/clean.csv"),
-        csv_buffer.getvalue().encode("utf-8"),
-        content_type="text/csv",
-    )
+    # The manifest marks the run as saved, so it is written only after all of these have landed.
+    saved_outputs = table.save(run_store, "output/clean.csv", "output/clean.parquet")
+    run_store.write_json("schema_spec.json", schema_spec)
 
-    saved_artifacts = [run_store.artifact_key("output/clean.csv")]
     save_manifest = {
         "run_id": run_store.run_id,
         "artifact_key": run_store.artifact_key("save_manifest.json"),
-        "saved_files": saved_artifacts,
-        "saved_uris": [run_store.uri_for("output/clean.csv")],
+        "saved_files": [run_store.artifact_key(name) for name in saved_outputs],
+        "saved_uris": [run_store.uri_for(name) for name in saved_outputs],
         "report_paths": [],
         "confidence": 0.7,
         "alternatives": [],
@@ -449,30 +536,58 @@ def _write_schema_and_output(
     run_store.write_json("save_manifest.json", save_manifest)
 
 
-def _read_preview_rows(input_path: str, max_rows: int = 5) -> Tuple[List[List[object]], Optional[str]]:
+class _SheetCache:
+    """
+    Raw sheets (header=None, dtype=object) of one input, parsed on first use. Created per
+    run_from_file/continue call and passed to the preview, header and data readers, so they share one
+    parse and the frames are released when the call returns.
+    """
+
+    def __init__(self, input_path: str):
+        self.input_path = input_path
+        self._sheets: Dict[Optional[str], Tuple[str, pd.DataFrame]] = {}
+
+    def get(self, sheet_name: Optional[str]) -> Tuple[str, pd.DataFrame]:
+        """
+        Returns (resolved sheet name, frame); None selects the first sheet. Callers must not mutate the frame.
+        """
+        if sheet_name not in self._sheets:
+            with open_excel(self.input_path) as excel:
+                resolved = sheet_name or excel.sheet_names[0]
+                if resolved not in self._sheets:
+                    self._sheets[resolved] = (resolved, excel.parse(resolved, header=None, dtype=object))
+            self._sheets[sheet_name] = self._sheets[resolved]
+        return self._sheets[sheet_name]
+
+
+def _read_excel_sheet(
+    input_path: str, sheet_name: Optional[str], sheets: Optional[_SheetCache]
+) -> Tuple[str, pd.DataFrame]:
+    # Without a run-scoped cache the sheet is parsed for this read only.
+    return (sheets or _SheetCache(input_path)).get(sheet_name)
+
+
+def _read_preview_rows(
+    input_path: str, max_rows: int = 5, sheets: Optional[_SheetCache] = None
+) -> Tuple[List[List[object]], Optional[str]]:
     extension = os.path.splitext(input_path)[1].lower()
     if extension in [".xlsx", ".xls"]:
-        excel = pd.ExcelFile(input_path)
-        sheet = excel.sheet_names[0]
-        df = pd.read_excel(input_path, sheet_name=sheet, header=None, dtype=object)
+        sheet, df = _read_excel_sheet(input_path, None, sheets)
         preview_rows = df.head(max_rows).fillna("").values.tolist()
         return preview_rows, sheet
     if extension in [".csv"]:
-        preview_rows = []
-        with open(input_path, "r", encoding="utf-8") as handle:
-            reader = csv.reader(handle)
-            for idx, row in enumerate(reader):
-                preview_rows.append(row)
-                if idx + 1 >= max_rows:
-                    break
-        return preview_rows, None
+        # newline="" lets csv.reader handle line endings, including newlines inside quoted cells.
+        with open(input_path, "r", encoding="utf-8", newline="") as handle:
+            return list(islice(csv.reader(handle), max_rows)), None
     raise ValueError(f"Unsupported input type: {input_path}")
 
 
-def _read_sheet_dataframe(input_path: str, sheet_name: Optional[str]) -> pd.DataFrame:
+def _read_sheet_dataframe(
+    input_path: str, sheet_name: Optional[str], sheets: Optional[_SheetCache] = None
+) -> pd.DataFrame:
     extension = os.path.splitext(input_path)[1].lower()
     if extension in [".xlsx", ".xls"]:
-        df = pd.read_excel(input_path, sheet_name=sheet_name or 0, header=None, dtype=object)
+        _, df = _read_excel_sheet(input_path, sheet_name, sheets)
         return df.fillna("")
     if extension in [".csv"]:
         df = pd.read_csv(input_path, header=None, dtype=object, keep_default_na=False)
@@ -480,47 +595,59 @@ def _read_sheet_dataframe(input_path: str, sheet_name: Optional[str]) -> pd.Data
     raise ValueError(f"Unsupported input type: {input_path}")
 
 
-def _read_data_rows(input_path: str, header_row: int, sheet_name: Optional[str]) -> List[List[object]]:
+def _iter_data_row_chunks(
+    input_path: str,
+    header_row: int,
+    sheet_name: Optional[str],
+    chunk_size: Optional[int] = None,
+    sheets: Optional[_SheetCache] = None,
+) -> Iterator[List[List[object]]]:
+    """
+    Yields the rows below header_row in lists of at most chunk_size (default DATA_ROW_CHUNK_SIZE) rows.
+    CSV input is tokenized lazily, so only one chunk of it is ever held as Python lists.
+    """
+    chunk_size = chunk_size or DATA_ROW_CHUNK_SIZE
     extension = os.path.splitext(input_path)[1].lower()
+    start = max(header_row + 1, 0)
     if extension in [".xlsx", ".xls"]:
-        df = pd.read_excel(input_path, sheet_name=sheet_name or 0, header=None, dtype=object)
-        return df.iloc[header_row + 1 :].fillna("").values.tolist()
+        _, df = _read_excel_sheet(input_path, sheet_name, sheets)
+        for offset in range(start, len(df), chunk_size):
+            yield df.iloc[offset : offset + chunk_size].fillna("").values.tolist()
+        return
     if extension in [".csv"]:
-        rows = []
-        with open(input_path, "r", encoding="utf-8") as handle:
-            reader = csv.reader(handle)
-            for idx, row in enumerate(reader):
-                if idx > header_row:
-                    rows.append(row)
-        return rows
+        with open(input_path, "r", encoding="utf-8", newline="") as handle:
+            reader = islice(csv.reader(handle), start, None)
+            while chunk := list(islice(reader, chunk_size)):
+                yield chunk
+        return
     raise ValueError(f"Unsupported input type: {input_path}")
 
 
-def _read_header_row(input_path: str, header_row: int, sheet_name: Optional[str]) -> List[object]:
+def _read_header_row(
+    input_path: str, header_row: int, sheet_name: Optional[str], sheets: Optional[_SheetCache] = None
+) -> List[object]:
     extension = os.path.splitext(input_path)[1].lower()
     if extension in [".xlsx", ".xls"]:
-        df = pd.read_excel(input_path, sheet_name=sheet_name or 0, header=None, dtype=object)
+        _, df = _read_excel_sheet(input_path, sheet_name, sheets)
         if header_row < 0 or header_row >= len(df):
             return []
         return df.iloc[header_row].fillna("").tolist()
     if extension in [".csv"]:
-        with open(input_path, "r", encoding="utf-8") as handle:
-            reader = csv.reader(handle)
-            for idx, row in enumerate(reader):
-                if idx == header_row:
-                    return row
-        return []
+        if header_row < 0:
+            return []
+        with open(input_path, "r", encoding="utf-8", newline="") as handle:
+            return next(islice(csv.reader(handle), header_row, None), [])
     raise ValueError(f"Unsupported input type: {input_path}")
 
 
 def _apply_table_region(
     headers: List[str],
-    data_rows: List[List[object]],
+    data_chunks: Iterable[List[List[object]]],
     header_row: int,
     table_region: Optional[Dict[str, object]],
-) -> Tuple[List[str], List[List[object]]]:
+) -> Tuple[List[str], Iterable[List[List[object]]]]:
     if not table_region:
-        return headers, data_rows
+        return headers, data_chunks
 
     start_row = table_region.get("start_row")
     end_row = table_region.get("end_row")
@@ -534,10 +661,6 @@ def _apply_table_region(
     end_offset = None
     if end_row is not None:
         end_offset = max(0, int(end_row) - data_start_index)
-    if end_offset is not None:
-        data_rows = data_rows[start_offset : end_offset + 1]
-    else:
-        data_rows = data_rows[start_offset:]
 
     if include_columns:
         keep = [idx for idx, name in enumerate(headers) if name in include_columns]
@@ -546,12 +669,20 @@ def _apply_table_region(
     else:
         keep = list(range(len(headers)))
 
-    headers = [headers[idx] for idx in keep]
-    filtered_rows = []
-    for row in data_rows:
-        filtered_rows.append([row[idx] if idx < len(row) else "" for idx in keep])
+    def region_chunks() -> Iterator[List[List[object]]]:
+        # Offsets are counted across chunks; reading stops once the end row has been passed.
+        position = 0
+        for chunk in data_chunks:
+            chunk_start = position
+            position += len(chunk)
+            low = max(start_offset - chunk_start, 0)
+            high = len(chunk) if end_offset is None else min(end_offset + 1 - chunk_start, len(chunk))
+            if low < high:
+                yield [[row[idx] if idx < len(row) else "" for idx in keep] for row in chunk[low:high]]
+            if end_offset is not None and position > end_offset:
+                break
 
-    return headers, filtered_rows
+    return [headers[idx] for idx in keep], region_chunks()
 
 
 def _apply_header_override(
@@ -559,12 +690,13 @@ def _apply_header_override(
     override: Dict[str, object],
     evidence: Dict[str, object],
     input_path: Optional[str],
+    sheets: Optional[_SheetCache] = None,
 ) -> Tuple[List[str], int]:
     sheet_name = override.get("sheet_name") or evidence.get("sheet_name")
     header_row_index = int(override.get("header_row_index", 0))
     raw_headers: List[object]
     if input_path:
-        raw_headers = _read_header_row(input_path, header_row_index, sheet_name)
+        raw_headers = _read_header_row(input_path, header_row_index, sheet_name, sheets)
     else:
         preview_rows = evidence.get("preview_rows", [])
         raw_headers = preview_rows[header_row_index] if header_row_index < len(preview_rows) else []
@@ -736,12 +868,10 @@ def _resolve_header_row(recipe: dict, df: pd.DataFrame, column_fields: List[dict
     if not normalized_headers:
         return 0
 
-    max_rows = min(len(df), 50)
     best_row = 0
     best_match = -1
-    for idx in range(max_rows):
-        row_values = df.iloc[idx].tolist()
-        normalized_row = {_normalize_label(value) for value in row_values if str(value).strip()}
+    for idx, normalized_row in enumerate(_normalized_labels(df.head(50))):
+        # Blank cells normalize to "", which is never a header name.
         match_count = len(normalized_headers.intersection(normalized_row))
         if match_count > best_match:
             best_match = match_count
@@ -749,32 +879,32 @@ def _resolve_header_row(recipe: dict, df: pd.DataFrame, column_fields: List[dict
     return best_row
 
 
+def _normalized_labels(frame: pd.DataFrame) -> List[List[str]]:
+    """
+    _normalize_label for every cell of frame, computed once per distinct cell text instead of per cell.
+    """
+    if frame.empty:
+        return []
+    codes, uniques = pd.factorize(frame.to_numpy(dtype=object).astype(str).ravel())
+    labels = pd.Series([" ".join(text.split()).lower() for text in uniques], dtype=object).to_numpy()
+    return labels[codes].reshape(frame.shape).tolist()
+
+
 def _write_manual_recipe_outputs(
     run_store: RunStore,
     column_fields: List[dict],
     data_rows: List[List[object]],
     metadata: Dict[str, object],
 ) -> None:
-    column_targets = [field["target"] for field in column_fields]
-    clean_data_buffer = io.StringIO()
-    writer = csv.writer(clean_data_buffer)
-    writer.writerow(column_targets)
-    writer.writerows(data_rows)
-    run_store.store.write_bytes(
-        run_store.store_key("output/clean_data.csv"),
-        clean_data_buffer.getvalue().encode("utf-8"),
-        content_type="text/csv",
-    )
-
-    run_store.write_json("output/extracted_metadata.json", metadata)
+    # clean_data.parquet backs the dashboard's footer row counts, so manual recipes always mirror it.
+    table = _TableOutput([field["target"] for field in column_fields], parquet=True)
+    table.write(data_rows)
 
     schema_fields = []
     if column_fields:
-        columns = list(zip(*data_rows)) if data_rows else [[] for _ in column_fields]
         for idx, field in enumerate(column_fields):
-            values = list(columns[idx]) if idx < len(columns) else []
-            dtype = field.get("data_type") or _infer_dtype(values)
-            required = all(str(v).strip() != "" for v in values) if values else False
+            inferred, required = table.column_profile(idx)
+            dtype = field.get("data_type") or inferred
             schema_fields.append(
                 {
                     "source": field.get("column_name") or f"col_{field.get('column_index', idx)}",
@@ -794,19 +924,21 @@ def _write_manual_recipe_outputs(
         "evidence_keys": [run_store.artifact_key("manual_recipe.json")],
         "refusal_reason": None,
     }
-    run_store.write_json("schema_spec.json", schema_spec)
+    # Manifest last, as in _write_schema_and_output.
+    csv_output, *parquet_output = table.save(run_store, "output/clean_data.csv", "output/clean_data.parquet")
+    run_store.store.write_many(
+        [
+            (run_store.store_key("output/extracted_metadata.json"), json_codec.dumps(metadata), "application/json"),
+            (run_store.store_key("schema_spec.json"), json_codec.dumps(schema_spec), "application/json"),
+        ]
+    )
+    saved_outputs = [csv_output, "output/extracted_metadata.json", *parquet_output]
 
     save_manifest = {
         "run_id": run_store.run_id,
         "artifact_key": run_store.artifact_key("save_manifest.json"),
-        "saved_files": [
-            run_store.artifact_key("output/clean_data.csv"),
-            run_store.artifact_key("output/extracted_metadata.json"),
-        ],
-        "saved_uris": [
-            run_store.uri_for("output/clean_data.csv"),
-            run_store.uri_for("output/extracted_metadata.json"),
-        ],
+        "saved_files": [run_store.artifact_key(name) for name in saved_outputs],
+        "saved_uris": [run_store.uri_for(name) for name in saved_outputs],
         "report_paths": [],
         "confidence": 0.9,
         "alternatives": [],
@@ -821,6 +953,7 @@ def _apply_manual_recipe(
     recipe: dict,
     evidence: dict,
     input_path: Optional[str],
+    sheets: Optional[_SheetCache] = None,
 ) -> None:
     if not input_path:
         raise ValueError("Manual recipe requires a readable input file.")
@@ -832,15 +965,14 @@ def _apply_manual_recipe(
     if not column_fields:
         raise ValueError("Manual recipe must include at least one column field to build a table.")
 
-    df = _read_sheet_dataframe(input_path, evidence.get("sheet_name"))
+    df = _read_sheet_dataframe(input_path, evidence.get("sheet_name"), sheets)
     header_row = _resolve_header_row(recipe, df, column_fields)
 
-    header_values = []
+    header_labels = []
     if 0 <= header_row < len(df):
-        header_values = df.iloc[header_row].tolist()
+        header_labels = _normalized_labels(df.iloc[header_row : header_row + 1])[0]
     header_index: Dict[str, int] = {}
-    for idx, value in enumerate(header_values):
-        key = _normalize_label(value)
+    for idx, key in enumerate(header_labels):
         if key and key not in header_index:
             header_index[key] = idx
 
@@ -954,7 +1086,8 @@ def puhemies_orchestrate(
         evidence["input_filename"] = filename
     if "structural_hash" not in evidence:
         evidence["structural_hash"] = _compute_structural_hash(preview_rows, source_label)
-    run_store.write_json("evidence_packet.json", evidence)
+    # Carries the preview rows; read back by the flow and the dashboards, not by people.
+    run_store.write_json("evidence_packet.json", evidence, indent=False)
 
     candidates = _build_header_candidates(preview_rows, evidence["artifact_key"])
     selected = _select_candidate(candidates)
@@ -1000,11 +1133,20 @@ def puhemies_orchestrate(
     )
 
 
-def puhemies_continue(run_id: str, artifacts_root: str) -> PuhemiesResponse:
+def puhemies_continue(run_id: str, artifacts_root: str, output_format: str = "csv") -> PuhemiesResponse:
+    return _continue_run(run_id, artifacts_root, None, output_format)
+
+
+def _continue_run(
+    run_id: str, artifacts_root: str, sheets: Optional[_SheetCache], output_format: str
+) -> PuhemiesResponse:
     run_store = _build_run_store(run_id, artifacts_root)
     evidence = run_store.read_json("evidence_packet.json")
 
     input_path = _prepare_local_input(evidence.get("source_uri"), evidence.get("input_artifact_key"), run_store)
+    # Sheets parsed by the calling run_from_file are reused only when they belong to the same input.
+    if input_path and (sheets is None or sheets.input_path != input_path):
+        sheets = _SheetCache(input_path)
     expected_hash = evidence.get("file_hash")
     if expected_hash and input_path:
         current_hash = _hash_file(input_path)
@@ -1028,10 +1170,17 @@ def puhemies_continue(run_id: str, artifacts_root: str) -> PuhemiesResponse:
             {"expected_hash": expected_hash, "source_uri": evidence.get("source_uri")},
         )
 
-    if run_store.exists("manual_recipe.json"):
+    present = run_store.existing(
+        "manual_recipe.json",
+        "header_override.json",
+        "human_confirmation.json",
+        "adapter_schema_spec.json",
+        "table_region.json",
+    )
+    if "manual_recipe.json" in present:
         manual_recipe = run_store.read_json("manual_recipe.json")
         try:
-            _apply_manual_recipe(run_store, manual_recipe, evidence, input_path)
+            _apply_manual_recipe(run_store, manual_recipe, evidence, input_path, sheets)
         except ValueError as exc:
             return PuhemiesResponse(
                 run_id=run_id,
@@ -1047,11 +1196,11 @@ def puhemies_continue(run_id: str, artifacts_root: str) -> PuhemiesResponse:
             next_step="review_artifacts",
         )
 
-    if run_store.exists("header_override.json"):
+    if "header_override.json" in present:
         override = run_store.read_json("header_override.json")
-        headers, header_row = _apply_header_override(run_store, override, evidence, input_path)
+        headers, header_row = _apply_header_override(run_store, override, evidence, input_path, sheets)
     else:
-        if not run_store.exists("human_confirmation.json"):
+        if "human_confirmation.json" not in present:
             return PuhemiesResponse(
                 run_id=run_id,
                 status="needs_human_confirmation",
@@ -1082,23 +1231,24 @@ def puhemies_continue(run_id: str, artifacts_root: str) -> PuhemiesResponse:
         header_row = selected["header_rows"][0]
 
     if input_path:
-        data_rows = _read_data_rows(
+        data_chunks = _iter_data_row_chunks(
             input_path,
             header_row,
             evidence.get("sheet_name"),
+            sheets=sheets,
         )
     else:
-        data_rows = evidence.get("preview_rows", [])[header_row + 1 :]
+        data_chunks = [evidence.get("preview_rows", [])[header_row + 1 :]]
     adapter_spec = None
-    if run_store.exists("adapter_schema_spec.json"):
+    if "adapter_schema_spec.json" in present:
         adapter_spec = run_store.read_json("adapter_schema_spec.json")
 
     table_region = None
-    if run_store.exists("table_region.json"):
+    if "table_region.json" in present:
         table_region = run_store.read_json("table_region.json")
 
-    headers, data_rows = _apply_table_region(headers, data_rows, header_row, table_region)
-    _write_schema_and_output(run_store, data_rows, headers, adapter_spec=adapter_spec)
+    headers, data_chunks = _apply_table_region(headers, data_chunks, header_row, table_region)
+    _write_schema_and_output(run_store, data_chunks, headers, adapter_spec=adapter_spec, output_format=output_format)
 
     return PuhemiesResponse(
         run_id=run_id,
@@ -1108,7 +1258,9 @@ def puhemies_continue(run_id: str, artifacts_root: str) -> PuhemiesResponse:
     )
 
 
-def puhemies_run_from_file(run_id: str, input_path: str, artifacts_root: str) -> PuhemiesResponse:
+def puhemies_run_from_file(
+    run_id: str, input_path: str, artifacts_root: str, output_format: str = "csv"
+) -> PuhemiesResponse:
     run_store = _build_run_store(run_id, artifacts_root)
     if is_gcs_uri(input_path):
         filename = os.path.basename(input_path.rstrip("/")) or "input"
@@ -1118,7 +1270,8 @@ def puhemies_run_from_file(run_id: str, input_path: str, artifacts_root: str) ->
         local_input = os.path.abspath(input_path)
         source_uri = f"file://{local_input}"
 
-    preview_rows, sheet_name = _read_preview_rows(local_input)
+    sheets = _SheetCache(local_input)
+    preview_rows, sheet_name = _read_preview_rows(local_input, sheets=sheets)
     file_hash = _hash_file(local_input)
     structural_hash = _compute_structural_hash(preview_rows, os.path.basename(local_input))
     input_artifact_key = _persist_input_copy(run_store, local_input, os.path.basename(local_input) or "input")
@@ -1138,5 +1291,5 @@ def puhemies_run_from_file(run_id: str, input_path: str, artifacts_root: str) ->
     if recalled:
         run_store.write_json("manual_recipe.json", recalled)
         _append_shadow(run_store, "manual_recipe_recalled", {"structural_hash": structural_hash})
-        return puhemies_continue(run_id, artifacts_root)
+        return _continue_run(run_id, artifacts_root, sheets, output_format)
     return response
@@ -21,6 +21,24 @@ REDACTION_SALT = os.environ.get("REDACTION_SALT", "preemptive-it-salt")
 LOCK_TTL_MINUTES = int(os.environ.get("LOCK_TTL_MINUTES", "30"))
 LOCK_KEY = "locks/worker.lock"
 
+# Compiled once: message templating and redaction run for every event in a snapshot.
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_SECRET_RES = [
+    re.compile(r"password=\S+", re.IGNORECASE),
+    re.compile(r"secret\s*[:=]\s*\S+", re.IGNORECASE),
+    re.compile(r"token=\S+", re.IGNORECASE),
+]
+_LONG_TOKEN_RE = re.compile(r"[A-Za-z0-9+/=]{24,}")
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PATH_RES = [
+    re.compile(r"[A-Za-z]:\\\\[^\\s]+"),
+    re.compile(r"[A-Za-z]:/[^\\s]+"),
+    re.compile(r"\\\\[A-Za-z0-9_.-]+\\\\[^\\s]+"),
+]
+_IPV4_RE = re.compile(r"\b(\d{1,3}\.\d{1,3}\.\d{1,3})\.\d{1,3}\b")
+_CLOCK_TIME_RE = re.compile(r"\d{2}:\d{2}:\d{2}")
+
 
 @dataclass
 class Incident:
@@ -53,8 +71,8 @@ def _parse_ts(ts: str) -> datetime:
 
 def _normalize_message_template(message: str) -> str:
     normalized = message.lower().strip()
-    normalized = re.sub(r"\s+", " ", normalized)
-    normalized = re.sub(r"\d+", "<n>", normalized)
+    normalized = _WHITESPACE_RE.sub(" ", normalized)
+    normalized = _DIGITS_RE.sub("<n>", normalized)
     return normalized
 
 
@@ -62,22 +80,15 @@ def _redact_message(message: str) -> str:
     if not message or REDACTION_MODE == "off":
         return message or ""
     redacted = message
-    secret_patterns = [
-        r"password=\S+",
-        r"secret\s*[:=]\s*\S+",
-        r"token=\S+",
-    ]
-    for pattern in secret_patterns:
-        redacted = re.sub(pattern, "[REDACTED]", redacted, flags=re.IGNORECASE)
-    redacted = re.sub(r"[A-Za-z0-9+/=]{24,}", "[REDACTED]", redacted)
-    redacted = re.sub(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "[REDACTED_EMAIL]", redacted)
-    redacted = re.sub(r"[A-Za-z]:\\\\[^\\s]+", "[REDACTED_PATH]", redacted)
-    redacted = re.sub(r"[A-Za-z]:/[^\\s]+", "[REDACTED_PATH]", redacted)
-    redacted = re.sub(r"\\\\[A-Za-z0-9_.-]+\\\\[^\\s]+", "[REDACTED_PATH]", redacted)
-    ip_pattern = r"\b(\d{1,3}\.\d{1,3}\.\d{1,3})\.\d{1,3}\b"
-    redacted = re.sub(ip_pattern, r"\1.0/24", redacted)
+    for pattern in _SECRET_RES:
+        redacted = pattern.sub("[REDACTED]", redacted)
+    redacted = _LONG_TOKEN_RE.sub("[REDACTED]", redacted)
+    redacted = _EMAIL_RE.sub("[REDACTED_EMAIL]", redacted)
+    for pattern in _PATH_RES:
+        redacted = pattern.sub("[REDACTED_PATH]", redacted)
+    redacted = _IPV4_RE.sub(r"\1.0/24", redacted)
     if REDACTION_MODE == "strict":
-        redacted = re.sub(r"\d{2}:\d{2}:\d{2}", "HH:MM:SS", redacted)
+        redacted = _CLOCK_TIME_RE.sub("HH:MM:SS", redacted)
     return redacted
 
 
@@ -163,14 +174,7 @@ def _append_shadow(store: ArtifactStore, run_id: str, stage: str, message: str,
     event = {"ts": _utc_now_iso(), "stage": stage, "message": message}
     if kwargs:
         event["meta"] = kwargs
-    key = f"{run_id}/shadow.jsonl"
-    existing = ""
-    if store.exists(key):
-        try:
-            existing = store.read_text(key)
-        except Exception:
-            existing = ""
-    store.write_text(key, f"{existing}{json.dumps(event)}\n", content_type="application/json")
+    store.append_line(f"{run_id}/shadow.jsonl", json.dumps(event), content_type="application/json")
 
 
 def _load_json(store: ArtifactStore, key: str) -> dict:
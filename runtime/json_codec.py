@@ -0,0 +1,25 @@
+from typing import Any, Union
+
+try:  # Optional dependency: orjson parses and serializes several times faster than stdlib json.
+    import orjson
+except ImportError:  # pragma: no cover - exercised only when orjson is missing
+    orjson = None
+    import json
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(payload: Any, indent: bool = True) -> bytes:
+    """
+    Serializes payload to UTF-8 JSON bytes, pretty-printed with two-space indentation by default.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(payload, option=option)
+    return json.dumps(payload, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,100 @@
+import csv
+from typing import Optional
+
+import pandas as pd
+
+try:  # Optional dependency: pyarrow's multithreaded CSV tokenizer.
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - exercised only when pyarrow is missing
+    pa = None
+    pacsv = None
+
+
+def as_arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Blank-fills df and stores each column as an Arrow-backed string array (one contiguous buffer
+    per column instead of a Python str object per cell). Without pyarrow only the fill is applied.
+    """
+    df = df.fillna("")
+    if pa is None:
+        return df
+    return df.astype(pd.StringDtype("pyarrow"))
+
+
+def _rewind(source) -> None:
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_excel(source, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_excel preferring the Rust-backed calamine engine; falls back to the pandas default
+    (openpyxl/xlrd) when python-calamine is not installed or pandas predates the engine.
+    """
+    if "engine" not in kwargs:
+        try:
+            return pd.read_excel(source, engine="calamine", **kwargs)
+        except (ImportError, ValueError):
+            _rewind(source)
+    return pd.read_excel(source, **kwargs)
+
+
+def open_excel(source) -> pd.ExcelFile:
+    """
+    pd.ExcelFile with the same engine preference as read_excel. Parse several sheets or row ranges
+    from one open workbook instead of re-inflating the container for each read_excel call.
+    """
+    try:
+        return pd.ExcelFile(source, engine="calamine")
+    except (ImportError, ValueError):
+        _rewind(source)
+    return pd.ExcelFile(source)
+
+
+def _first_row_width(source) -> int:
+    if hasattr(source, "readline"):
+        line = source.readline()
+        _rewind(source)
+    else:
+        with open(source, "rb") as handle:
+            line = handle.readline()
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    return len(next(csv.reader([line]), []))
+
+
+def read_csv_strings(source, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Reads a headerless CSV as all-string columns labelled 0..N-1 with blanks kept as "", the
+    same shape as pd.read_csv(header=None, dtype=str, keep_default_na=False). Uses the pyarrow
+    tokenizer when available and falls back to pandas for inputs pyarrow rejects (e.g. ragged rows).
+    With nrows, record batches are streamed only until that many rows have been read.
+    """
+    if pacsv is not None:
+        try:
+            width = _first_row_width(source)
+            read_options = pacsv.ReadOptions(autogenerate_column_names=True)
+            convert_options = pacsv.ConvertOptions(
+                column_types={f"f{index}": pa.string() for index in range(width)},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False,
+            )
+            if nrows is None:
+                table = pacsv.read_csv(source, read_options=read_options, convert_options=convert_options)
+            else:
+                reader = pacsv.open_csv(source, read_options=read_options, convert_options=convert_options)
+                batches = []
+                total = 0
+                for batch in reader:
+                    batches.append(batch)
+                    total += batch.num_rows
+                    if total >= nrows:
+                        break
+                table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, nrows)
+            df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+            df.columns = range(df.shape[1])
+            return df
+        except pa.ArrowInvalid:
+            _rewind(source)
+    return pd.read_csv(source, header=None, dtype=str, keep_default_na=False, nrows=nrows)
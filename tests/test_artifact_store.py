@@ -1,4 +1,11 @@
+import io
+import sys
+import types
+
+import pytest
+
 from runtime.artifact_store import (
+    ArtifactStore,
     LocalArtifactStore,
     build_artifact_store,
     is_gcs_uri,
@@ -32,3 +39,378 @@ def test_gcs_uri_parsing():
     bucket, prefix = parse_gcs_uri("gs://bucket-name/path/value")
     assert bucket == "bucket-name"
     assert prefix == "path/value"
+
+
+def test_local_store_read_tail_and_last_line(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    lines = [f'{{"event": "step_{idx}"}}' for idx in range(500)]
+    store.write_text("run_a/shadow.jsonl", "\n".join(lines) + "\n\n")
+
+    assert store.read_tail("run_a/shadow.jsonl", 3) == b"}\n\n"
+    assert store.read_last_line("run_a/shadow.jsonl", window=8) == b'{"event": "step_499"}'
+
+    store.write_text("run_a/single.jsonl", '{"event": "only"}')
+    assert store.read_last_line("run_a/single.jsonl") == b'{"event": "only"}'
+    store.write_text("run_a/empty.jsonl", "")
+    assert store.read_last_line("run_a/empty.jsonl") == b""
+
+
+def test_local_store_count_lines_streams_chunks(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+
+    store.write_text("run_a/clean.csv", "a,b\n" + "1,2\n" * 100)
+    assert store.count_lines("run_a/clean.csv", chunk_size=7) == 101
+
+    store.write_text("run_a/no_newline.csv", "a,b\n1,2")
+    assert store.count_lines("run_a/no_newline.csv", chunk_size=3) == 2
+
+    store.write_text("run_a/empty.csv", "")
+    assert store.count_lines("run_a/empty.csv") == 0
+
+    with store.open_stream("run_a/no_newline.csv") as handle:
+        assert handle.read() == b"a,b\n1,2"
+    assert store.size("run_a/no_newline.csv") == 7
+
+
+def test_local_store_read_json_accepts_codec_output(tmp_path):
+    from runtime import json_codec
+
+    store = LocalArtifactStore(tmp_path)
+    payload = {"fields": [{"name": "Määrä", "pointer": "B"}], "header_row": 2}
+    store.write_bytes("run_a/manual_recipe.json", json_codec.dumps(payload))
+    assert store.read_json("run_a/manual_recipe.json") == payload
+
+    store.write_json("run_a/plain.json", payload)
+    assert json_codec.loads(store.read_text("run_a/plain.json")) == payload
+
+    store.write_json("run_a/compact.json", payload, indent=False)
+    assert b"\n" not in store.read_bytes("run_a/compact.json")
+    assert store.read_json("run_a/compact.json") == payload
+
+
+def test_local_store_writes_replace_without_leftovers(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_json("run_a/table_region.json", {"start_row": 1})
+    store.write_json("run_a/table_region.json", {"start_row": 2})
+    store.write_text("run_a/notes.txt", "Määrä\n")
+
+    assert store.read_json("run_a/table_region.json") == {"start_row": 2}
+    assert store.read_text("run_a/notes.txt") == "Määrä\n"
+    assert sorted(store.list("run_a")) == ["run_a/notes.txt", "run_a/table_region.json"]
+
+
+def test_local_store_list_skips_pending_write_temp_files(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    seen = []
+
+    class _Source:
+        def __init__(self):
+            self.chunks = [b"a,b\n", b""]
+
+        def read(self, size=-1):
+            # Runs while the temp file is open, as a concurrent listing would.
+            seen.append(store.list("run_a"))
+            return self.chunks.pop(0)
+
+    store.write_stream("run_a/output/clean.csv", _Source())
+    (tmp_path / "run_a" / "output" / ".tmp-0123abcd-clean.csv").write_bytes(b"orphaned by a killed writer")
+
+    assert seen[0] == []
+    assert store.list("run_a") == ["run_a/output/clean.csv"]
+
+
+def test_local_store_list_walks_nested_keys(tmp_path):
+    store = LocalArtifactStore(tmp_path / "root")
+    store.write_text("run_a/hosts/h1/timeline.json", "{}")
+    store.write_text("run_a/shadow.jsonl", "{}\n")
+    store.write_text("run_b/output/clean.csv", "a\n")
+    (tmp_path / "outside").mkdir()
+    (tmp_path / "outside" / "secret.json").write_text("{}")
+    (tmp_path / "root" / "run_b" / "linked").symlink_to(tmp_path / "outside", target_is_directory=True)
+
+    assert sorted(store.list("")) == ["run_a/hosts/h1/timeline.json", "run_a/shadow.jsonl", "run_b/output/clean.csv"]
+    assert sorted(store.list("run_a/")) == ["run_a/hosts/h1/timeline.json", "run_a/shadow.jsonl"]
+    assert store.list("run_a/shadow.jsonl") == ["run_a/shadow.jsonl"]
+    assert store.list("missing") == []
+
+
+def test_local_store_read_bytes_serves_unchanged_files_from_memory(tmp_path, monkeypatch):
+    store = LocalArtifactStore(tmp_path)
+    store.write_bytes("run_a/header_spec.json", b'{"v": 1}')
+    assert store.read_bytes("run_a/header_spec.json") == b'{"v": 1}'
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: opened.append(args[0]) or real_open(*args, **kwargs))
+    assert store.read_bytes("run_a/header_spec.json") == b'{"v": 1}'
+    assert opened == []
+
+    store.write_bytes("run_a/header_spec.json", b'{"v": 2}')
+    assert store.read_bytes("run_a/header_spec.json") == b'{"v": 2}'
+    store.delete("run_a/header_spec.json")
+    with pytest.raises(FileNotFoundError):
+        store.read_bytes("run_a/header_spec.json")
+
+
+def test_local_store_list_runs_returns_directories_only(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_text("run_b/shadow.jsonl", "{}\n")
+    store.write_text("run_a/output/clean.csv", "a\n")
+    store.write_text("stray.json", "{}")
+    assert store.list_runs() == ["run_a", "run_b"]
+
+    assert LocalArtifactStore(tmp_path / "missing").list_runs() == []
+
+
+def test_list_top_level_returns_child_directories(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_text("run_a/hosts/h2/timeline.json", "{}")
+    store.write_text("run_a/hosts/h1/timeline.json", "{}")
+    store.write_text("run_a/hosts/h1/events.json", "{}")
+    store.write_text("run_a/hosts/stray.json", "{}")
+
+    assert store.list_top_level("run_a/hosts") == ["h1", "h2"]
+    assert store.list_top_level("run_a/hosts/") == ["h1", "h2"]
+    assert store.list_top_level("") == ["run_a"]
+    assert store.list_top_level("missing") == []
+    assert ArtifactStore.list_top_level(store, "run_a/hosts") == ["h1", "h2"]
+
+
+def test_local_store_delete(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_text("run_a/output/clean.csv", "a\n1\n")
+
+    assert store.delete("run_a/output/clean.csv") is True
+    assert not store.exists("run_a/output/clean.csv")
+    assert store.delete("run_a/output/clean.csv") is False
+
+
+def test_local_store_exists_many(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_text("run_a/header_spec.json", "{}")
+    store.write_text("run_a/table_region.json", "{}")
+
+    keys = ["run_a/header_spec.json", "run_a/table_region.json", "run_a/manual_recipe.json"]
+    assert store.exists_many(keys) == {"run_a/header_spec.json", "run_a/table_region.json"}
+    assert store.exists_many([]) == set()
+
+
+def test_local_store_write_many(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.write_many(
+        [
+            ("run_a/schema_spec.json", b"{}", "application/json"),
+            ("run_a/output/clean.csv", b"a\n1\n", "text/csv"),
+        ]
+    )
+
+    assert store.read_bytes("run_a/schema_spec.json") == b"{}"
+    assert store.read_text("run_a/output/clean.csv") == "a\n1\n"
+
+
+def test_local_store_create_if_absent(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+
+    assert store.create_if_absent("run_a/lock", b'{"owner": "a"}') is True
+    assert store.create_if_absent("run_a/lock", b'{"owner": "b"}') is False
+    assert store.read_bytes("run_a/lock") == b'{"owner": "a"}'
+    assert store.list("run_a") == ["run_a/lock"]
+
+
+def test_local_store_write_stream(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    payload = b"x" * ((1 << 20) + 17)
+
+    store.write_stream("run_a/input/big.bin", io.BytesIO(payload))
+    ArtifactStore.write_stream(store, "run_a/input/small.bin", io.BytesIO(b"abc"))
+
+    assert store.read_bytes("run_a/input/big.bin") == payload
+    assert store.read_bytes("run_a/input/small.bin") == b"abc"
+    assert sorted(store.list("run_a/input")) == ["run_a/input/big.bin", "run_a/input/small.bin"]
+
+
+def test_append_line_starts_each_entry_on_its_own_line(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    store.append_line("run_a/shadow.jsonl", '{"event": "start"}')
+    store.write_text("run_b/shadow.jsonl", '{"event": "hand_edited"}')
+
+    for key in ("run_a/shadow.jsonl", "run_b/shadow.jsonl"):
+        store.append_line(key, '{"event": "done"}')
+        ArtifactStore.append_line(store, key, '{"event": "fallback"}')
+
+    assert store.read_text("run_a/shadow.jsonl").splitlines() == [
+        '{"event": "start"}',
+        '{"event": "done"}',
+        '{"event": "fallback"}',
+    ]
+    assert store.read_text("run_b/shadow.jsonl").endswith('"hand_edited"}\n{"event": "done"}\n{"event": "fallback"}\n')
+    assert store.read_last_line("run_b/shadow.jsonl") == b'{"event": "fallback"}'
+
+
+def test_local_store_version_changes_on_rewrite(tmp_path):
+    store = LocalArtifactStore(tmp_path)
+    assert store.version("recipe_store/recipe_index.json") is None
+
+    store.write_json("recipe_store/recipe_index.json", {"a": {}})
+    first = store.version("recipe_store/recipe_index.json")
+    assert first == store.version("recipe_store/recipe_index.json")
+
+    store.write_json("recipe_store/recipe_index.json", {"b": {}})
+    assert store.version("recipe_store/recipe_index.json") != first
+    assert ArtifactStore.version(store, "recipe_store/recipe_index.json") != ArtifactStore.version(
+        store, "recipe_store/recipe_index.json"
+    )
+
+
+class _FakeGcsErrors:
+    class NotFound(Exception):
+        pass
+
+    class PreconditionFailed(Exception):
+        pass
+
+    class RequestRangeNotSatisfiable(Exception):
+        pass
+
+
+class _FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.content_type = None
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        if if_generation_match is not None and self.bucket.generation_of(self.name) != if_generation_match:
+            raise _FakeGcsErrors.PreconditionFailed(self.name)
+        self.bucket.put(self.name, data)
+
+    def download_as_bytes(self, start=None):
+        if self.name not in self.bucket.objects:
+            raise _FakeGcsErrors.NotFound(self.name)
+        data = self.bucket.objects[self.name][1]
+        if start is not None and start < 0 and not data:
+            raise _FakeGcsErrors.RequestRangeNotSatisfiable(self.name)
+        return data[start:] if start is not None else data
+
+    def compose(self, sources, if_generation_match=None):
+        self.bucket.before_compose()
+        if if_generation_match is not None and self.bucket.generation_of(self.name) != if_generation_match:
+            raise _FakeGcsErrors.PreconditionFailed(self.name)
+        self.bucket.put(self.name, b"".join(self.bucket.objects[source.name][1] for source in sources))
+
+    def delete(self):
+        if self.bucket.objects.pop(self.name, None) is None:
+            raise _FakeGcsErrors.NotFound(self.name)
+
+
+class _FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.counter = 0
+        self.before_compose = lambda: None
+
+    def generation_of(self, name):
+        return self.objects[name][0] if name in self.objects else 0
+
+    def put(self, name, data):
+        self.counter += 1
+        self.objects[name] = (self.counter, data)
+
+    def blob(self, name, chunk_size=None):
+        return _FakeBlob(self, name)
+
+    def get_blob(self, name):
+        if name not in self.objects:
+            return None
+        blob = _FakeBlob(self, name)
+        blob.generation = self.objects[name][0]
+        return blob
+
+
+def _install_fake_google(monkeypatch):
+    google = types.ModuleType("google")
+    google.cloud = types.ModuleType("google.cloud")
+    google.cloud.storage = types.ModuleType("google.cloud.storage")
+    google.api_core = types.ModuleType("google.api_core")
+    google.api_core.exceptions = _FakeGcsErrors
+    modules = {
+        "google": google,
+        "google.cloud": google.cloud,
+        "google.cloud.storage": google.cloud.storage,
+        "google.api_core": google.api_core,
+        "google.api_core.exceptions": _FakeGcsErrors,
+    }
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    return google
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch):
+    _install_fake_google(monkeypatch)
+    bucket = _FakeBucket()
+    client = types.SimpleNamespace(bucket=lambda name: bucket)
+    from runtime.artifact_store import GCSArtifactStore
+
+    return GCSArtifactStore("bucket", prefix="runs", client=client), bucket
+
+
+def test_gcs_append_line_retries_when_another_writer_appends_first(fake_gcs):
+    store, bucket = fake_gcs
+    store.append_line("run_a/shadow.jsonl", '{"event": "start"}')
+    assert bucket.objects["runs/run_a/shadow.jsonl"][1] == b'{"event": "start"}\n'
+
+    racing = []
+
+    def other_writer_appends():
+        # The first compose loses the race to a writer that appends a line without a trailing newline.
+        if not racing:
+            racing.append(True)
+            data = bucket.objects["runs/run_a/shadow.jsonl"][1]
+            bucket.put("runs/run_a/shadow.jsonl", data + b'{"event": "other"}')
+
+    bucket.before_compose = other_writer_appends
+    store.append_line("run_a/shadow.jsonl", '{"event": "done"}')
+
+    assert bucket.objects["runs/run_a/shadow.jsonl"][1] == b'{"event": "start"}\n{"event": "other"}\n{"event": "done"}\n'
+    assert list(bucket.objects) == ["runs/run_a/shadow.jsonl"]
+
+
+def test_gcs_store_builds_its_client_on_a_pooled_session(monkeypatch):
+    requests = pytest.importorskip("requests")
+    from runtime.artifact_store import GCS_HTTP_POOL_SIZE, GCSArtifactStore
+
+    google = _install_fake_google(monkeypatch)
+    built = {}
+
+    class FakeClient:
+        SCOPE = ("https://www.googleapis.com/auth/devstorage.full_control",)
+
+        def __init__(self, **kwargs):
+            built.update(kwargs)
+
+        def bucket(self, name):
+            return _FakeBucket()
+
+    class FakeAuthorizedSession(requests.Session):
+        def __init__(self, credentials):
+            super().__init__()
+            self.credentials = credentials
+
+    google.cloud.storage.Client = FakeClient
+    google.auth = types.ModuleType("google.auth")
+    google.auth.default = lambda scopes: (("credentials", scopes), "project-a")
+    google.auth.transport = types.ModuleType("google.auth.transport")
+    google.auth.transport.requests = types.ModuleType("google.auth.transport.requests")
+    google.auth.transport.requests.AuthorizedSession = FakeAuthorizedSession
+    monkeypatch.setitem(sys.modules, "google.auth", google.auth)
+    monkeypatch.setitem(sys.modules, "google.auth.transport", google.auth.transport)
+    monkeypatch.setitem(sys.modules, "google.auth.transport.requests", google.auth.transport.requests)
+    monkeypatch.delenv("STORAGE_EMULATOR_HOST", raising=False)
+
+    GCSArtifactStore("bucket")
+
+    session = built["_http"]
+    assert built["project"] == "project-a"
+    assert session.credentials == built["credentials"] == ("credentials", FakeClient.SCOPE)
+    assert session.get_adapter("https://storage.googleapis.com/")._pool_maxsize == GCS_HTTP_POOL_SIZE
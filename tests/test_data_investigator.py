@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+
+from runtime.data_investigator import (
+    clear_caches,
+    get_column_inventory,
+    scan_dataframe_structure,
+    scan_file_structure,
+)
+
+
+def test_scan_dataframe_structure_finds_first_dense_pair():
+    df = pd.DataFrame(
+        [
+            ["Sales Report", "", "", ""],
+            ["", "  ", "", ""],
+            ["Code", "Qty", "Amount", ""],
+            ["X100", "3", "19.95", ""],
+        ]
+    )
+    assert scan_dataframe_structure(df) == 2
+
+
+def test_scan_dataframe_structure_defaults_to_first_row():
+    assert scan_dataframe_structure(pd.DataFrame()) == 0
+    assert scan_dataframe_structure(pd.DataFrame([["a", "b"]])) == 0
+    assert scan_dataframe_structure(pd.DataFrame([["a", ""], ["", "b"]])) == 0
+
+
+def test_scan_file_structure_csv(tmp_path):
+    path = tmp_path / "report.csv"
+    path.write_text("Sales Report,,,\n,,,\nCode,Qty,Amount,\nX100,3,19.95,\nX200,1,5.00,\n", encoding="utf-8")
+
+    assert scan_file_structure(str(path)) == 2
+    assert scan_file_structure(str(path), sample_rows=2) == 0
+
+
+def test_file_scans_are_memoized_until_the_file_changes(tmp_path):
+    path = tmp_path / "report.csv"
+    path.write_text("Code,Qty\nX100,3\n", encoding="utf-8")
+    clear_caches()
+
+    first = get_column_inventory(str(path), 0)
+    first[0]["original_name"] = "mutated"
+    assert get_column_inventory(str(path), 0)[0]["original_name"] == "Code"
+    assert scan_file_structure(str(path)) == 0
+
+    path.write_text("Title,\nCode,Qty\nX100,3\n", encoding="utf-8")
+    os.utime(path, ns=(0, 0))
+    assert [item["original_name"] for item in get_column_inventory(str(path), 1)] == ["Code", "Qty"]
+    assert scan_file_structure(str(path)) == 1
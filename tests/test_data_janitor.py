@@ -0,0 +1,30 @@
+import math
+
+import pandas as pd
+
+from runtime.data_janitor import clean_series, clean_value, read_with_flattened_headers
+
+
+def test_clean_series_number_strips_symbols_and_coerces():
+    series = pd.Series(["$1,234.50", "-3", "1.2.3", "", None, "12 kg", 7], dtype=object)
+
+    cleaned = clean_series(series, "number")
+
+    assert cleaned.dtype == "float64"
+    assert cleaned.tolist()[:2] == [1234.5, -3.0]
+    assert all(math.isnan(value) for value in cleaned.tolist()[2:5])
+    assert cleaned.tolist()[5:] == [12.0, 7.0]
+
+
+def test_clean_value_number_matches_series_path():
+    assert clean_value("€ 19,95", "number") == 1995.0
+    assert clean_value("n/a", "number") is None
+    assert clean_value(None, "number") is None
+
+
+def test_read_with_flattened_headers_joins_filled_parts(tmp_path):
+    path = tmp_path / "headers.xlsx"
+    rows = [["title", None, None], ["Sales", None, " Costs "], ["Q1", "Q2", None], [1, 2, 3]]
+    pd.DataFrame(rows).to_excel(path, header=False, index=False)
+
+    assert read_with_flattened_headers(str(path), 1, 2) == ["Sales_Q1", "Sales_Q2", "Costs_Q2"]
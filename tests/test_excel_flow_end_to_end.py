@@ -1,6 +1,8 @@
 import json
 import os
 
+import pytest
+
 from runtime.excel_flow import puhemies_orchestrate, puhemies_continue
 
 
@@ -57,3 +59,98 @@ def test_excel_flow_requires_confirmation_and_completes(tmp_path):
     event_names = {event["event"] for event in events}
     assert "stop_due_to_ambiguous_headers" in event_names
     assert "human_confirmation_received" in event_names
+
+
+def test_xlsx_flow_parses_the_workbook_once_per_call(tmp_path, monkeypatch):
+    import pandas as pd
+
+    import runtime.excel_flow as excel_flow
+
+    input_path = tmp_path / "messy.xlsx"
+    rows = [
+        ["Sales Report Q1", None, None],
+        ["Product Code", "Qty", "Amount"],
+        ["X100", 3, 19.95],
+        ["Y200", 1, 5.5],
+    ]
+    pd.DataFrame(rows).to_excel(input_path, header=False, index=False, sheet_name="Data")
+
+    opened = []
+    real_open_excel = excel_flow.open_excel
+
+    def counting_open_excel(source):
+        opened.append(source)
+        return real_open_excel(source)
+
+    monkeypatch.setattr(excel_flow, "open_excel", counting_open_excel)
+    artifacts_root = str(tmp_path / "artifacts")
+    excel_flow.puhemies_run_from_file("run_xlsx", str(input_path), artifacts_root)
+    assert len(opened) == 1
+    write_human_confirmation(artifacts_root, "run_xlsx", "row_1")
+    response = excel_flow.puhemies_continue("run_xlsx", artifacts_root)
+
+    assert response.status == "ok"
+    with open(os.path.join(artifacts_root, "run_xlsx", "output", "clean.csv"), encoding="utf-8") as handle:
+        assert handle.read().splitlines()[1:] == ["X100,3,19.95", "Y200,1,5.5"]
+    # Parsed sheets are scoped to one call, so resuming parses the workbook again.
+    assert len(opened) == 2
+
+
+def test_adapter_spec_enforces_number_and_date_types(tmp_path):
+    from runtime.excel_flow import puhemies_run_from_file
+
+    input_path = tmp_path / "orders.csv"
+    input_path.write_text(
+        "Orders export,,\nOrder Date,Product Code,Amount\n2025-01-02,X100,\"USD 1,234.50\"\n,Y200,n/a\n",
+        encoding="utf-8",
+    )
+    artifacts_root = str(tmp_path / "artifacts")
+    puhemies_run_from_file("run_adapter", str(input_path), artifacts_root)
+    adapter_spec = {
+        "canonical_fields": ["order_date", "sku", "amount"],
+        "field_map": {"order_date": "order_date", "sku": "product_code", "amount": "amount"},
+        "types": {"order_date": "date", "amount": "number"},
+    }
+    with open(os.path.join(artifacts_root, "run_adapter", "adapter_schema_spec.json"), "w", encoding="utf-8") as handle:
+        json.dump(adapter_spec, handle)
+    write_human_confirmation(artifacts_root, "run_adapter", "row_1")
+
+    assert puhemies_continue("run_adapter", artifacts_root).status == "ok"
+    output_dir = os.path.join(artifacts_root, "run_adapter", "output")
+    with open(os.path.join(output_dir, "clean.csv"), encoding="utf-8") as handle:
+        assert handle.read().splitlines() == ["order_date,sku,amount", "2025-01-02,X100,1234.50", ",Y200,"]
+    # CSV only unless the Parquet mirror is requested.
+    assert not os.path.exists(os.path.join(output_dir, "clean.parquet"))
+
+    parquet = pytest.importorskip("pyarrow.parquet")
+    assert puhemies_continue("run_adapter", artifacts_root, output_format="parquet").status == "ok"
+    with open(os.path.join(artifacts_root, "run_adapter", "save_manifest.json"), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    assert manifest["saved_files"] == ["artifacts/run_adapter/output/clean.csv", "artifacts/run_adapter/output/clean.parquet"]
+    assert parquet.read_table(os.path.join(output_dir, "clean.parquet")).to_pylist()[1] == {
+        "order_date": "",
+        "sku": "Y200",
+        "amount": "",
+    }
+
+
+def test_table_region_spans_data_row_chunks(tmp_path, monkeypatch):
+    import runtime.excel_flow as excel_flow
+
+    input_path = tmp_path / "long.csv"
+    lines = ["Id,Name,Notes"] + [f"{idx},name{idx},note{idx}" for idx in range(10)]
+    input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    artifacts_root = str(tmp_path / "artifacts")
+    excel_flow.puhemies_run_from_file("run_chunks", str(input_path), artifacts_root)
+    region = {"start_row": 3, "end_row": 8, "exclude_columns": ["notes"]}
+    with open(os.path.join(artifacts_root, "run_chunks", "table_region.json"), "w", encoding="utf-8") as handle:
+        json.dump(region, handle)
+    write_human_confirmation(artifacts_root, "run_chunks", "row_0")
+    monkeypatch.setattr(excel_flow, "DATA_ROW_CHUNK_SIZE", 3)
+
+    assert excel_flow.puhemies_continue("run_chunks", artifacts_root).status == "ok"
+    with open(os.path.join(artifacts_root, "run_chunks", "output", "clean.csv"), encoding="utf-8") as handle:
+        assert handle.read().splitlines() == ["id,name"] + [f"{idx},name{idx}" for idx in range(2, 8)]
+    with open(os.path.join(artifacts_root, "run_chunks", "schema_spec.json"), encoding="utf-8") as handle:
+        fields = json.load(handle)["schema_spec"]["fields"]
+    assert [(field["dtype"], field["required"]) for field in fields] == [("number", True), ("string", True)]
@@ -2,6 +2,8 @@ import csv
 import json
 import os
 
+import pytest
+
 from runtime.excel_flow import puhemies_continue, puhemies_run_from_file
 
 
@@ -62,6 +64,12 @@ def test_manual_recipe_applied(tmp_path):
     assert output_rows[1] == ["X100", "3.0", "2025-01-01"]
     assert output_rows[2] == ["Y200", "1.0", "2025-01-01"]
 
+    parquet = pytest.importorskip("pyarrow.parquet")
+    table = parquet.read_table(output_dir / "clean_data.parquet")
+    assert table.num_rows == 2
+    assert table.column_names == output_rows[0]
+    assert table.to_pylist()[0] == {"product_code": "X100", "qty": "3.0", "report_date": "2025-01-01"}
+
 
 def test_manual_recipe_requires_columns(tmp_path):
     artifacts_root = tmp_path / "artifacts"
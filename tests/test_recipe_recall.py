@@ -49,3 +49,17 @@ def test_recipe_recall_applies_manual_recipe(tmp_path):
     output_dir = artifacts_root / "run_second" / "output"
     assert (output_dir / "clean_data.csv").exists()
     assert (output_dir / "extracted_metadata.json").exists()
+
+
+def test_concurrent_recipe_saves_keep_every_index_entry(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from runtime.artifact_store import LocalArtifactStore
+    from runtime.excel_flow import RECIPE_INDEX_KEY, _store_recipe_for_hash
+
+    store = LocalArtifactStore(tmp_path / "artifacts")
+    hashes = [f"hash_{idx}" for idx in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda structural_hash: _store_recipe_for_hash(store, structural_hash, {"fields": []}, "run"), hashes))
+
+    assert sorted(store.read_json(RECIPE_INDEX_KEY)) == sorted(hashes)
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from runtime.table_reader import as_arrow_strings, open_excel, read_csv_strings, read_excel
+
+
+def test_read_excel_returns_strings_with_any_engine(tmp_path):
+    path = tmp_path / "input.xlsx"
+    pd.DataFrame([["Title", None], ["a", "b"], ["x", "y"]]).to_excel(path, header=False, index=False)
+
+    df = read_excel(str(path), header=None, dtype=str).fillna("")
+    assert df.values.tolist() == [["Title", ""], ["a", "b"], ["x", "y"]]
+
+    with open(path, "rb") as handle:
+        df = read_excel(handle, header=None, dtype=str).fillna("")
+    assert df.shape == (3, 2)
+
+
+def test_open_excel_parses_sheets_and_row_ranges(tmp_path):
+    path = tmp_path / "input.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame([["Title"], ["a"], ["x"]]).to_excel(writer, sheet_name="first", header=False, index=False)
+        pd.DataFrame([["Other"]]).to_excel(writer, sheet_name="second", header=False, index=False)
+
+    workbook = open_excel(str(path))
+    assert workbook.sheet_names == ["first", "second"]
+    assert workbook.parse(sheet_name="first", header=None, nrows=2).values.tolist() == [["Title"], ["a"]]
+    assert workbook.parse(sheet_name="second", header=None).values.tolist() == [["Other"]]
+
+
+def test_read_csv_strings_matches_pandas_shape(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("Report,,\nCode,Qty,Amount\n001,,19.95\n", encoding="utf-8")
+
+    df = read_csv_strings(str(path))
+    expected = pd.read_csv(path, header=None, dtype=str, keep_default_na=False)
+    assert list(df.columns) == [0, 1, 2]
+    assert df.values.tolist() == expected.values.tolist()
+    assert df.iloc[2, 0] == "001"
+
+
+def test_read_csv_strings_falls_back_on_ragged_rows(tmp_path):
+    path = tmp_path / "ragged.csv"
+    path.write_text("a,b,c\n1,2,3\n", encoding="utf-8")
+    assert read_csv_strings(str(path)).shape == (2, 3)
+
+    path.write_text("a,b\n1,2\n3\n", encoding="utf-8")
+    df = read_csv_strings(str(path))
+    assert df.shape == (3, 2)
+    assert df.iloc[2, 1] == ""
+
+
+def test_read_csv_strings_limits_rows(tmp_path):
+    path = tmp_path / "tall.csv"
+    path.write_text("a,b\n" + "".join(f"{i},{i}\n" for i in range(5000)), encoding="utf-8")
+
+    df = read_csv_strings(str(path), nrows=10)
+    assert df.shape == (10, 2)
+    assert df.iloc[9].tolist() == ["8", "8"]
+
+
+def test_as_arrow_strings_fills_blanks():
+    pytest.importorskip("pyarrow")
+    df = as_arrow_strings(pd.DataFrame([["a", None], [None, "b"]], dtype=object))
+    assert all(dtype == pd.StringDtype("pyarrow") for dtype in df.dtypes)
+    assert df.values.tolist() == [["a", ""], ["", "b"]]